@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+"""
+generate-corpus.py - Write a deterministic synthetic Claude Code session corpus.
+
+The corpus is laid out like a real home directory, so the smart-commit
+scripts run against it unchanged with HOME=<output>:
+
+    <output>/.claude/projects/<encoded project>/<session id>.jsonl
+    <output>/.claude/history.jsonl
+    <output>/corpus.json    (manifest: parameters, sessions, bytes, lines)
+
+Sessions are sequences of turns: a user message (English or Korean), then
+assistant entries with Edit/Write/NotebookEdit and non-file tool calls, each
+followed by its tool result, with file-history snapshots and malformed lines
+mixed in. The same seed and options always produce byte-identical files.
+
+--entry-shape selects where message content goes: "nested" writes it under
+"message" as Claude Code does (user turns typed "user"), "flat" writes it as
+a top-level "content" with user turns typed "human" (the shape smart-commit's
+parser reads), and "both" (default) writes both, so the same corpus drives
+smart-commit and worktrace.
+Sessions are streamed to disk, so multi-GB corpora do not need the memory.
+"""
+
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+
+DEFAULT_PROJECT = "/bench/project"
+START_EPOCH_MS = 1_767_225_600_000  # 2026-01-01T00:00:00Z
+
+ENGLISH_WORDS = (
+    "add", "fix", "update", "refactor", "rename", "remove", "support", "handle", "parser",
+    "config", "cache", "login", "session", "error", "message", "test", "docs", "api",
+    "endpoint", "button", "layout", "query", "timeout", "retry", "the", "for", "in",
+    "with", "a", "and", "module", "function", "validation", "logging", "script",
+)
+KOREAN_WORDS = (
+    "추가", "수정", "변경", "삭제", "로그인", "세션", "에러", "메시지", "테스트", "문서",
+    "설정", "캐시", "버튼", "레이아웃", "쿼리", "재시도", "기능", "처리", "해줘", "좀",
+    "파일", "함수", "검증", "로깅", "스크립트",
+)
+# Phrases that start a new task (see commit_analyzer.INTENT_CHANGE_MARKERS)
+ENGLISH_MARKERS = ("now", "next", "also", "another thing:", "after that")
+KOREAN_MARKERS = ("이제", "다음으로", "그리고", "다른 거")
+
+SOURCE_DIRS = ("src", "src/api", "src/ui", "lib", "tests", "docs", "scripts")
+SOURCE_EXTS = (".py", ".ts", ".tsx", ".md", ".json")
+
+# Source text that Write contents and Edit strings are sliced from
+CODE_CHUNK = "".join(
+    f'def handler_{i}(request, retries={i % 5}):\n'
+    f'    """Handle request {i} and return "ok" or raise.\\n"""\n'
+    f'    value = request.get("key_{i}", {{}}).get(\'nested\')\n'
+    f'    if not value:\n'
+    f'        raise ValueError(f"missing key_{i}: {{request!r}}")\n'
+    f'    return {{"status": "ok", "path": "C:\\\\tmp\\\\{i}", "tab": "\\t"}}\n\n'
+    for i in range(400)
+)
+
+SIZE_PATTERN = re.compile(r"^(\d+(?:\.\d+)?)\s*([KMG]?B?)$", re.IGNORECASE)
+SIZE_UNITS = {"": 1, "B": 1, "K": 1024, "KB": 1024, "M": 1024 ** 2, "MB": 1024 ** 2,
+              "G": 1024 ** 3, "GB": 1024 ** 3}
+
+
+def parse_size(text: str) -> int:
+    """Parse a size such as 512KB, 10MB or 2GB into bytes."""
+    match = SIZE_PATTERN.match(text.strip())
+    if not match:
+        raise argparse.ArgumentTypeError(f"invalid size: {text!r} (e.g. 512KB, 10MB, 2GB)")
+    return int(float(match.group(1)) * SIZE_UNITS[match.group(2).upper()])
+
+
+def encode_project_path(path: str) -> str:
+    """Encode project path to Claude's directory name format."""
+    return re.sub(r"[/.]", "-", path)
+
+
+def iso_timestamp(epoch_ms: int) -> str:
+    """Format epoch milliseconds the way session entries do."""
+    dt = datetime.fromtimestamp(epoch_ms / 1000, tz=timezone.utc)
+    return dt.strftime("%Y-%m-%dT%H:%M:%S.") + f"{epoch_ms % 1000:03d}Z"
+
+
+def code_text(rng: random.Random, size: int) -> str:
+    """Return size characters of source-like text at a random offset."""
+    start = rng.randrange(len(CODE_CHUNK))
+    text = CODE_CHUNK[start:start + size]
+    while len(text) < size:
+        text += CODE_CHUNK[:size - len(text)]
+    return text
+
+
+class SessionWriter:
+    """Generate one session's entries and stream them to a JSONL file."""
+
+    def __init__(self, rng: random.Random, args: argparse.Namespace, session_id: str, start_ms: int):
+        self.rng = rng
+        self.args = args
+        self.session_id = session_id
+        self.now_ms = start_ms
+        self.parent_uuid = None
+        self.project_files = [
+            f"{rng.choice(SOURCE_DIRS)}/{'_'.join(rng.sample(ENGLISH_WORDS[:24], 2))}{rng.choice(SOURCE_EXTS)}"
+            for _ in range(args.files)
+        ]
+        self.notebooks = [f"notebooks/analysis_{i}.ipynb" for i in range(max(1, args.files // 20))]
+        self.working_set = self.project_files[:1]  # Files the current task edits
+        self.snapshot_versions = {}
+        self.bytes = 0
+        self.lines = 0
+        self.messages = []  # (timestamp, text) of user messages, for history.jsonl
+
+    def tick(self, low_ms: int, high_ms: int) -> str:
+        self.now_ms += self.rng.randint(low_ms, high_ms)
+        return iso_timestamp(self.now_ms)
+
+    def envelope(self, entry_type: str, timestamp: str) -> dict:
+        entry_uuid = str(uuid.UUID(int=self.rng.getrandbits(128), version=4))
+        entry = {
+            "parentUuid": self.parent_uuid,
+            "isSidechain": False,
+            "userType": "external",
+            "cwd": self.args.project,
+            "sessionId": self.session_id,
+            "version": "2.0.0",
+            "type": entry_type,
+            "uuid": entry_uuid,
+            "timestamp": timestamp,
+        }
+        self.parent_uuid = entry_uuid
+        return entry
+
+    def message(self, entry_type: str, role: str, timestamp: str, content, **fields) -> dict:
+        """Build a message entry in the --entry-shape layout."""
+        entry = self.envelope(entry_type, timestamp)
+        shape = self.args.entry_shape
+        if shape != "nested":
+            entry["content"] = content
+        if shape != "flat":
+            entry["message"] = {"role": role, "content": content, **fields}
+        return entry
+
+    def write(self, f, entry) -> None:
+        line = (entry if isinstance(entry, str) else json.dumps(entry, ensure_ascii=False, separators=(",", ":")))
+        data = (line + "\n").encode("utf-8")
+        f.write(data)
+        self.bytes += len(data)
+        self.lines += 1
+
+    def user_message(self, new_task: bool = False) -> str:
+        rng = self.rng
+        korean = rng.random() < self.args.korean_ratio
+        words = KOREAN_WORDS if korean else ENGLISH_WORDS
+        text = " ".join(rng.choice(words) for _ in range(rng.randint(3, 24)))
+        if new_task:
+            text = f"{rng.choice(KOREAN_MARKERS if korean else ENGLISH_MARKERS)} {text}"
+        if rng.random() < 0.5:
+            text += f" in {rng.choice(self.working_set)}"
+        return text
+
+    def tool_call(self) -> dict:
+        rng = self.rng
+        args = self.args
+        tool_id = f"toolu_{rng.getrandbits(64):016x}"
+        if rng.random() >= args.file_tool_ratio:
+            name = rng.choice(("Read", "Bash", "Grep", "Glob"))
+            if name == "Bash":
+                inp = {"command": f"python -m pytest -q tests/test_{rng.randint(0, 99)}.py",
+                       "description": "Run tests"}
+            else:
+                inp = {"file_path": f"{args.project}/{rng.choice(self.project_files)}"}
+            return {"type": "tool_use", "id": tool_id, "name": name, "input": inp}
+
+        name = rng.choices(("Edit", "Write", "NotebookEdit"), weights=(70, 25, 5))[0]
+        if rng.random() < 0.03:
+            file_path = f"/tmp/scratch_{rng.randint(0, 9)}.py"  # Outside the project
+        elif name == "NotebookEdit":
+            file_path = f"{args.project}/{rng.choice(self.notebooks)}"
+        else:
+            # Mostly the current task's files; a stray edit makes tasks share a file
+            files = self.working_set if rng.random() < 0.97 else self.project_files
+            file_path = f"{args.project}/{rng.choice(files)}"
+
+        if name == "Write":
+            large = rng.random() < args.large_write_ratio
+            size = args.large_write_kb * 1024 if large else rng.randint(200, 6000)
+            inp = {"file_path": file_path, "content": code_text(rng, size)}
+        elif name == "Edit":
+            inp = {"file_path": file_path, "old_string": code_text(rng, rng.randint(20, 600)),
+                   "new_string": code_text(rng, rng.randint(20, 1500))}
+        else:
+            inp = {"notebook_path": file_path, "file_path": file_path,
+                   "new_source": code_text(rng, rng.randint(50, 2000)), "cell_type": "code"}
+        return {"type": "tool_use", "id": tool_id, "name": name, "input": inp}
+
+    def turn(self, f) -> None:
+        rng = self.rng
+        args = self.args
+        # A new task starts after a long pause or with a marker phrase, and
+        # moves on to a new set of files
+        pause = rng.random() < 0.1
+        new_task = not pause and rng.random() < 0.25
+        if pause or new_task:
+            self.working_set = rng.sample(self.project_files, min(len(self.project_files), rng.randint(1, 5)))
+        gap = (600_000, 3_600_000) if pause else (5_000, 120_000)
+        text = self.user_message(new_task)
+        timestamp = self.tick(*gap)
+        content = text if rng.random() < 0.5 else [{"type": "text", "text": text}]
+        entry_type = "user" if args.entry_shape == "nested" else "human"
+        self.write(f, self.message(entry_type, "user", timestamp, content))
+        self.messages.append((self.now_ms, text))
+
+        for _ in range(rng.randint(1, 2 * args.tools_per_turn)):
+            blocks = [self.tool_call() for _ in range(rng.randint(1, 3))]
+            if rng.random() < 0.4:
+                blocks.insert(0, {"type": "text", "text": f"I'll {self.user_message()} now."})
+            timestamp = self.tick(500, 20_000)
+            message_id = f"msg_{rng.getrandbits(64):016x}"
+            usage = {"input_tokens": rng.randint(100, 90_000), "output_tokens": rng.randint(10, 4000)}
+            self.write(f, self.message("assistant", "assistant", timestamp, blocks,
+                                       id=message_id, type="message", model="synthetic", usage=usage))
+
+            for block in blocks:
+                if block["type"] != "tool_use":
+                    continue
+                timestamp = self.tick(100, 5_000)
+                content = [{"type": "tool_result", "tool_use_id": block["id"],
+                            "content": code_text(rng, rng.randint(40, 3000))}]
+                self.write(f, self.message("user", "user", timestamp, content))
+
+            if rng.random() < args.malformed_ratio:
+                self.write(f, '{"type":"assistant","content":[{"type":"tool_use","name":"Edit","input":{"file_')
+
+        if rng.random() < args.snapshot_ratio:
+            data = {}
+            for path in rng.sample(self.project_files, min(len(self.project_files), rng.randint(1, 8))):
+                version = self.snapshot_versions.get(path, 0) + rng.randint(0, 1)
+                self.snapshot_versions[path] = version
+                data[f"{args.project}/{path}"] = {"backupFileName": f"{rng.getrandbits(32):08x}@v{version}",
+                                                  "version": version}
+            entry = self.envelope("file-history-snapshot", iso_timestamp(self.now_ms))
+            entry["data"] = data
+            self.write(f, entry)
+
+    def run(self, path: Path, target_bytes: int, turns: int) -> None:
+        with open(path, "wb") as f:
+            done = 0
+            while (done < turns) if turns else (self.bytes < target_bytes):
+                self.turn(f)
+                done += 1
+        os.utime(path, (self.now_ms / 1000, self.now_ms / 1000))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Write a deterministic synthetic Claude Code session corpus."
+    )
+    parser.add_argument("--output", type=str, required=True,
+                        help="Corpus directory (used as HOME when running the scripts)")
+    parser.add_argument("--size", type=parse_size, default=parse_size("10MB"),
+                        help="Total corpus size, split evenly over sessions (default: 10MB)")
+    parser.add_argument("--turns", type=int, default=0,
+                        help="Generate exactly this many turns per session instead of filling --size")
+    parser.add_argument("--sessions", type=int, default=1, help="Number of sessions (default: 1)")
+    parser.add_argument("--seed", type=int, default=1, help="Random seed (default: 1)")
+    parser.add_argument("--project", type=str, default=DEFAULT_PROJECT,
+                        help=f"Project path the sessions edit (default: {DEFAULT_PROJECT})")
+    parser.add_argument("--files", type=int, default=60,
+                        help="Distinct project files edited per session (default: 60)")
+    parser.add_argument("--tools-per-turn", type=int, default=3,
+                        help="Average assistant tool-call entries per turn (default: 3)")
+    parser.add_argument("--file-tool-ratio", type=float, default=0.6,
+                        help="Fraction of tool calls that are Edit/Write/NotebookEdit (default: 0.6)")
+    parser.add_argument("--large-write-ratio", type=float, default=0.02,
+                        help="Fraction of Write calls with a --large-write-kb payload (default: 0.02)")
+    parser.add_argument("--large-write-kb", type=int, default=256,
+                        help="Size of large Write payloads in KB (default: 256)")
+    parser.add_argument("--snapshot-ratio", type=float, default=0.5,
+                        help="Fraction of turns followed by a file-history snapshot (default: 0.5)")
+    parser.add_argument("--korean-ratio", type=float, default=0.4,
+                        help="Fraction of user messages written in Korean (default: 0.4)")
+    parser.add_argument("--malformed-ratio", type=float, default=0.01,
+                        help="Chance of a truncated JSON line after each assistant entry (default: 0.01)")
+    parser.add_argument("--entry-shape", choices=("nested", "flat", "both"), default="both",
+                        help="Message content under \"message\" (Claude Code), top-level (smart-commit's "
+                             "parser) or both (default: both)")
+    parser.add_argument("--verbose", action="store_true", help="Print progress to stderr")
+    args = parser.parse_args()
+
+    if args.sessions < 1 or args.files < 1 or args.tools_per_turn < 1:
+        parser.error("--sessions, --files and --tools-per-turn must be at least 1")
+
+    output = Path(args.output)
+    sessions_dir = output / ".claude" / "projects" / encode_project_path(args.project)
+    try:
+        sessions_dir.mkdir(parents=True, exist_ok=True)
+    except OSError as e:
+        print(f"[ERROR] Cannot create {sessions_dir}: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    rng = random.Random(args.seed)
+    start_ms = START_EPOCH_MS
+    sessions = []
+    history = []
+    for _ in range(args.sessions):
+        session_id = str(uuid.UUID(int=rng.getrandbits(128), version=4))
+        writer = SessionWriter(random.Random(rng.getrandbits(64)), args, session_id, start_ms)
+        path = sessions_dir / f"{session_id}.jsonl"
+        writer.run(path, args.size // args.sessions, args.turns)
+        sessions.append({"session_id": session_id, "path": str(path),
+                         "bytes": writer.bytes, "lines": writer.lines,
+                         "start_ms": start_ms, "end_ms": writer.now_ms})
+        history.extend({"display": text, "pastedContents": {}, "timestamp": ts,
+                        "project": args.project, "sessionId": session_id}
+                       for ts, text in writer.messages)
+        start_ms = writer.now_ms + 60_000
+        if args.verbose:
+            print(f"[VERBOSE] {session_id}: {writer.lines} lines, {writer.bytes} bytes", file=sys.stderr)
+
+    with open(output / ".claude" / "history.jsonl", "w", encoding="utf-8") as f:
+        for entry in history:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    params = {key: value for key, value in vars(args).items() if key not in ("output", "verbose")}
+    manifest = {
+        "params": params,
+        "project": args.project,
+        "sessions": sessions,
+        "bytes": sum(s["bytes"] for s in sessions),
+        "lines": sum(s["lines"] for s in sessions),
+    }
+    with open(output / "corpus.json", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    print(json.dumps(manifest, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,446 @@
+#!/usr/bin/env python3
+"""
+run-benchmarks.py - Benchmark parse-session.py and analyze-commits.py on synthetic corpora.
+
+For each corpus size, a single-session corpus is generated with
+generate-corpus.py (kept in --work-dir and reused while its parameters match)
+and every stage is run as a separate process with HOME pointing at the corpus:
+
+    read-text        the text-mode loader the scripts used before jsonl_reader.py:
+                     open(..., "r") and json.loads() per line into a list
+    read-mmap        jsonl_reader.iter_jsonl() over the same session file
+    parse            parse-session.py --no-snapshots
+    parse+snapshots  parse-session.py (snapshots deduplicated into blobs)
+    checkpoint       parse-session.py --checkpoint, re-run with nothing appended
+    analyze          analyze-commits.py --session-data <parse output>
+    end-to-end       analyze-commits.py --session-file (parse and analyze in one process)
+    pipe             parse-session.py --no-snapshots | analyze-commits.py, the two-process
+                     pipeline end-to-end replaces
+    worktrace        worktrace-plugin's worktrace.py --json over the corpus days, with
+                     its caches cleared; fails unless it reports session activity
+
+Each stage reports its best wall time over --repeat runs, throughput in
+corpus lines/sec and MB/sec, and the peak RSS of the stage's process (for
+pipe, the sum of both processes' peaks, since they run at the same time).
+With --baseline, results are compared with an earlier --json output and the
+exit status is 1 if any stage got slower or bigger beyond --threshold.
+Peak RSS is read from os.wait4(), so this runs on Linux and macOS only.
+
+With --ops, the corpus stages are skipped and map_ops_to_user_turns() is
+timed in-process instead, over synthetic op lists of each given size (one
+user message per 10 ops), both in user_msg_index order (merge pass) and
+shuffled (bisect).
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import random
+import re
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+SCRIPTS_DIR = BENCH_DIR.parent / "skills" / "smart-commit" / "scripts"
+GENERATOR = BENCH_DIR / "generate-corpus.py"
+WORKTRACE = BENCH_DIR.parents[1] / "worktrace-plugin" / "skills" / "worktrace" / "scripts" / "worktrace.py"
+
+# Corpora carry message content in both layouts, so one corpus drives both plugins
+CORPUS_SHAPE = "both"
+
+DEFAULT_SIZES = "1MB,10MB,100MB"
+DEFAULT_OPS = "1k,10k,100k,1M"
+STAGES = ("read-text", "read-mmap", "parse", "parse+snapshots", "checkpoint", "analyze", "end-to-end", "pipe",
+          "worktrace")
+
+# Reader stages, run as `python -c <code> <session file> <scripts dir>`. read-text
+# is the loader parse-session.py and worktrace.py had before jsonl_reader.py
+READ_TEXT = """
+import json, sys
+entries = []
+with open(sys.argv[1], "r", encoding="utf-8") as f:
+    for line in f:
+        line = line.strip()
+        if line:
+            try:
+                entries.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+"""
+READ_MMAP = """
+import sys
+from pathlib import Path
+sys.path.insert(0, sys.argv[2])
+from jsonl_reader import iter_jsonl
+for entry in iter_jsonl(Path(sys.argv[1])):
+    pass
+"""
+
+# ru_maxrss is in kilobytes on Linux and in bytes on macOS
+RSS_SCALE = 1 if sys.platform == "darwin" else 1024
+
+# generate-corpus.py is not an importable module name; load it by path for parse_size()
+_spec = importlib.util.spec_from_file_location("generate_corpus", GENERATOR)
+generate_corpus = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(generate_corpus)
+
+
+def format_size(size: int) -> str:
+    """Format a byte count the way sizes are given on the command line."""
+    for unit, scale in (("GB", 1024 ** 3), ("MB", 1024 ** 2), ("KB", 1024)):
+        if size >= scale and size % scale == 0:
+            return f"{size // scale}{unit}"
+    return f"{size}B"
+
+
+def parse_count(text: str) -> int:
+    """Parse an op count such as 1000, 10k or 1M."""
+    match = re.match(r"^(\d+)([kKmM]?)$", text.strip())
+    if not match:
+        raise argparse.ArgumentTypeError(f"invalid count: {text!r} (use e.g. 1000, 10k, 1M)")
+    scale = {"": 1, "k": 1000, "m": 1_000_000}[match.group(2).lower()]
+    return int(match.group(1)) * scale
+
+
+def format_count(count: int) -> str:
+    """Format an op count the way counts are given on the command line."""
+    for unit, scale in (("M", 1_000_000), ("k", 1000)):
+        if count >= scale and count % scale == 0:
+            return f"{count // scale}{unit}"
+    return str(count)
+
+
+def benchmark_op_mapping(count: int, seed: int, repeat: int) -> dict:
+    """Time map_ops_to_user_turns() on count ops; return {order: metrics}."""
+    sys.path.insert(0, str(SCRIPTS_DIR))
+    from commit_analyzer import FileOp, map_ops_to_user_turns
+
+    rng = random.Random(seed)
+    messages = [{"index": i, "text": ""} for i in range(max(1, count // 10))]
+    indices = [rng.randrange(len(messages)) for _ in range(count)]
+    results = {}
+    for order, op_indices in (("merge pass", sorted(indices)), ("bisect", indices)):
+        walls = []
+        for _ in range(repeat):
+            ops = [FileOp("src/app.py", user_msg_index=i) for i in op_indices]
+            start = time.perf_counter()
+            map_ops_to_user_turns(ops, messages)
+            walls.append(time.perf_counter() - start)
+        wall = min(walls)
+        results[order] = {"seconds": round(wall, 4), "ops_per_sec": round(count / wall) if wall else None}
+    return results
+
+
+def print_ops_table(results: list[dict]) -> None:
+    """Print --ops results as an aligned text table."""
+    print(f"{'ops':>7}  {'mapping':<12}{'seconds':>9}{'ops/s':>13}")
+    for r in results:
+        for order, m in r["orders"].items():
+            print(f"{format_count(r['ops']):>7}  {order:<12}{m['seconds']:>9.4f}{m['ops_per_sec'] or 0:>13}")
+
+
+def run_measured(cmd: list[str], env: dict, stdout_path: Path) -> tuple[float, int]:
+    """Run cmd to completion and return (wall seconds, peak RSS bytes) of that process.
+
+    Raises RuntimeError with the captured stderr if cmd fails.
+    """
+    with open(stdout_path, "wb") as out:
+        start = time.perf_counter()
+        proc = subprocess.Popen(cmd, env=env, stdout=out, stderr=subprocess.PIPE)
+        # Drain stderr first so a chatty child cannot block on a full pipe
+        stderr = proc.stderr.read()
+        _, status, rusage = os.wait4(proc.pid, 0)
+        wall = time.perf_counter() - start
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    proc.stderr.close()
+    if proc.returncode != 0:
+        raise RuntimeError(f"{' '.join(cmd)} exited with {proc.returncode}:\n{stderr.decode(errors='replace')}")
+    return wall, rusage.ru_maxrss * RSS_SCALE
+
+
+def run_pipeline(cmds: list[list[str]], env: dict, stdout_path: Path) -> tuple[float, int]:
+    """Run cmds as a shell-style pipeline; return (wall seconds, summed peak RSS bytes).
+
+    Raises RuntimeError with the captured stderr if any command fails.
+    """
+    with open(stdout_path, "wb") as out:
+        start = time.perf_counter()
+        procs = []
+        stdin = None
+        for i, cmd in enumerate(cmds):
+            last = i == len(cmds) - 1
+            procs.append(subprocess.Popen(cmd, env=env, stdin=stdin,
+                                          stdout=out if last else subprocess.PIPE,
+                                          stderr=subprocess.PIPE))
+            if stdin is not None:
+                stdin.close()  # Only the next process keeps the read end
+            stdin = procs[-1].stdout
+        # Drain stderr pipes in threads so no process blocks on a full pipe
+        stderrs = [b""] * len(procs)
+
+        def drain(i: int) -> None:
+            stderrs[i] = procs[i].stderr.read()
+
+        threads = [threading.Thread(target=drain, args=(i,)) for i in range(len(procs))]
+        for thread in threads:
+            thread.start()
+        peak_rss = 0
+        statuses = []
+        for proc in procs:
+            _, status, rusage = os.wait4(proc.pid, 0)
+            statuses.append(os.waitstatus_to_exitcode(status))
+            peak_rss += rusage.ru_maxrss * RSS_SCALE
+        wall = time.perf_counter() - start
+        for thread in threads:
+            thread.join()
+    for proc, cmd, code, stderr in zip(procs, cmds, statuses, stderrs):
+        proc.returncode = code
+        proc.stderr.close()
+        if code != 0:
+            raise RuntimeError(f"{' '.join(cmd)} exited with {code}:\n{stderr.decode(errors='replace')}")
+    return wall, peak_rss
+
+
+def ensure_corpus(work_dir: Path, size: int, seed: int, verbose: bool) -> dict:
+    """Generate the corpus for size unless an identical one already exists; return its manifest."""
+    corpus_dir = work_dir / f"corpus-{format_size(size)}-seed{seed}"
+    manifest_file = corpus_dir / "corpus.json"
+    if manifest_file.exists():
+        manifest = json.loads(manifest_file.read_text())
+        params = manifest["params"]
+        if (params.get("size"), params.get("seed"), params.get("entry_shape")) == (size, seed, CORPUS_SHAPE):
+            return manifest
+
+    if verbose:
+        print(f"[VERBOSE] Generating {format_size(size)} corpus in {corpus_dir}", file=sys.stderr)
+    subprocess.run([sys.executable, str(GENERATOR), "--output", str(corpus_dir),
+                    "--size", str(size), "--seed", str(seed), "--entry-shape", CORPUS_SHAPE],
+                   check=True, stdout=subprocess.DEVNULL)
+    return json.loads(manifest_file.read_text())
+
+
+def utc_date(epoch_ms: int) -> str:
+    """Format epoch milliseconds as a YYYY-MM-DD date in UTC."""
+    return datetime.fromtimestamp(epoch_ms / 1000, tz=timezone.utc).strftime("%Y-%m-%d")
+
+
+def clear_worktrace_caches(home: Path) -> None:
+    """Remove the session catalog and worktrace caches, so worktrace reads every session."""
+    cache_dir = home / ".claude" / "cache"
+    shutil.rmtree(cache_dir / "worktrace", ignore_errors=True)
+    try:
+        (cache_dir / "session-catalog.sqlite").unlink()
+    except FileNotFoundError:
+        pass
+
+
+def check_worktrace_activity(report_path: Path) -> None:
+    """Raise RuntimeError unless a worktrace --json report has prompts, tool calls and edited files."""
+    try:
+        with open(report_path, "r", encoding="utf-8") as f:
+            report = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        raise RuntimeError(f"worktrace produced no JSON report: {e}")
+    totals = {"prompts": 0, "tool_calls": 0, "files_edited": 0}
+    for day in report.get("days", []):
+        for group in day["groups"].values():
+            for session in group.get("sessions", []):
+                for key in totals:
+                    totals[key] += session[key]
+    if not all(totals.values()):
+        raise RuntimeError(f"worktrace reported no session activity: {totals}")
+
+
+def benchmark_corpus(manifest: dict, work_dir: Path, repeat: int, verbose: bool) -> dict:
+    """Run every stage on a corpus and return {stage: metrics}."""
+    session = manifest["sessions"][0]
+    session_file = Path(session["path"])
+    home = session_file.parents[3]
+    project = manifest["project"]
+    env = dict(os.environ, HOME=str(home))
+    py = sys.executable
+    parse = [py, str(SCRIPTS_DIR / "parse-session.py"), "--project", project,
+             "--session", session["session_id"]]
+    parsed = work_dir / "parsed.json"
+    discard = work_dir / "stage-output.json"
+
+    commands = {
+        "read-text": ([py, "-c", READ_TEXT, str(session_file), str(SCRIPTS_DIR)], discard),
+        "read-mmap": ([py, "-c", READ_MMAP, str(session_file), str(SCRIPTS_DIR)], discard),
+        "parse": (parse + ["--no-snapshots"], parsed),
+        "parse+snapshots": (parse, discard),
+        "checkpoint": (parse + ["--no-snapshots", "--checkpoint"], discard),
+        "analyze": ([py, str(SCRIPTS_DIR / "analyze-commits.py"), "--session-data", str(parsed)], discard),
+        "end-to-end": ([py, str(SCRIPTS_DIR / "analyze-commits.py"), "--session-file", str(session_file),
+                        "--project", project], discard),
+        "pipe": ([parse + ["--no-snapshots"], [py, str(SCRIPTS_DIR / "analyze-commits.py")]], discard),
+        "worktrace": ([py, str(WORKTRACE), "--from", utc_date(session["start_ms"]),
+                       "--to", utc_date(session["end_ms"]), "--timezone", "UTC", "--json"],
+                      work_dir / "worktrace.json"),
+    }
+
+    # Write the checkpoint the checkpoint stage resumes from
+    run_measured(commands["checkpoint"][0], env, discard)
+
+    results = {}
+    for stage in STAGES:
+        cmd, stdout_path = commands[stage]
+        walls, peak_rss = [], 0
+        for _ in range(repeat):
+            if stage == "worktrace":
+                clear_worktrace_caches(home)
+            if stage == "pipe":
+                wall, rss = run_pipeline(cmd, env, stdout_path)
+            else:
+                wall, rss = run_measured(cmd, env, stdout_path)
+            walls.append(wall)
+            peak_rss = max(peak_rss, rss)
+        if stage == "worktrace":
+            check_worktrace_activity(stdout_path)
+        wall = min(walls)
+        results[stage] = {
+            "seconds": round(wall, 4),
+            "lines_per_sec": round(session["lines"] / wall),
+            "mb_per_sec": round(session["bytes"] / wall / 1024 ** 2, 2),
+            "peak_rss_mb": round(peak_rss / 1024 ** 2, 1),
+        }
+        if verbose:
+            print(f"[VERBOSE] {stage}: {results[stage]}", file=sys.stderr)
+    return results
+
+
+def compare(results: list[dict], baseline: list[dict], threshold: float) -> list[str]:
+    """Return a description of each stage slower or bigger than its baseline beyond threshold."""
+    previous = {(r["size"], stage): metrics for r in baseline for stage, metrics in r["stages"].items()}
+    regressions = []
+    for r in results:
+        for stage, metrics in r["stages"].items():
+            base = previous.get((r["size"], stage))
+            if not base:
+                continue
+            for key in ("seconds", "peak_rss_mb"):
+                if base[key] and metrics[key] > base[key] * (1 + threshold):
+                    regressions.append(f"{format_size(r['size'])} {stage}: {key} "
+                                       f"{base[key]} -> {metrics[key]} (+{metrics[key] / base[key] - 1:.0%})")
+    return regressions
+
+
+def print_table(results: list[dict]) -> None:
+    """Print results as an aligned text table."""
+    print(f"{'size':>7}  {'stage':<16}{'seconds':>9}{'lines/s':>11}{'MB/s':>9}{'RSS MB':>9}")
+    for r in results:
+        for stage, m in r["stages"].items():
+            print(f"{format_size(r['size']):>7}  {stage:<16}{m['seconds']:>9.3f}{m['lines_per_sec']:>11}"
+                  f"{m['mb_per_sec']:>9.2f}{m['peak_rss_mb']:>9.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark parse-session.py and analyze-commits.py on synthetic corpora."
+    )
+    parser.add_argument(
+        "--sizes",
+        type=str,
+        default=DEFAULT_SIZES,
+        help=f"Comma-separated corpus sizes, 1MB up to 2GB (default: {DEFAULT_SIZES})"
+    )
+    parser.add_argument(
+        "--work-dir",
+        type=str,
+        default=str(Path.home() / ".cache" / "smart-commit-bench"),
+        help="Where corpora and stage outputs are kept (default: ~/.cache/smart-commit-bench)"
+    )
+    parser.add_argument("--seed", type=int, default=1, help="Corpus seed (default: 1)")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per stage; the fastest is reported (default: 3)")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON (usable as --baseline)")
+    parser.add_argument("--baseline", type=str, help="Earlier --json output to compare against")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="With --baseline: allowed slowdown or RSS growth as a fraction (default: 0.2)"
+    )
+    parser.add_argument(
+        "--ops",
+        type=str,
+        nargs="?",
+        const=DEFAULT_OPS,
+        help=f"Time map_ops_to_user_turns() over these op counts instead of the corpus stages "
+             f"(default when given without a value: {DEFAULT_OPS})"
+    )
+    parser.add_argument("--verbose", action="store_true", help="Print progress to stderr")
+    args = parser.parse_args()
+
+    if args.ops:
+        if args.baseline:
+            parser.error("--baseline cannot be combined with --ops")
+        if args.repeat < 1:
+            parser.error("--repeat must be at least 1")
+        try:
+            counts = [parse_count(c) for c in args.ops.split(",") if c.strip()]
+        except argparse.ArgumentTypeError as e:
+            parser.error(str(e))
+        results = []
+        for count in counts:
+            results.append({"ops": count, "orders": benchmark_op_mapping(count, args.seed, args.repeat)})
+            if args.verbose:
+                print(f"[VERBOSE] {format_count(count)} ops: {results[-1]['orders']}", file=sys.stderr)
+        if args.json:
+            print(json.dumps({"seed": args.seed, "python": sys.version.split()[0], "ops_results": results},
+                             indent=2))
+        else:
+            print_ops_table(results)
+        return
+
+    if not hasattr(os, "wait4"):
+        print("[ERROR] Peak RSS measurement needs os.wait4 (Linux or macOS).", file=sys.stderr)
+        sys.exit(1)
+    try:
+        sizes = [generate_corpus.parse_size(s) for s in args.sizes.split(",") if s.strip()]
+    except argparse.ArgumentTypeError as e:
+        parser.error(str(e))
+    if args.repeat < 1:
+        parser.error("--repeat must be at least 1")
+
+    baseline = None
+    if args.baseline:
+        try:
+            with open(args.baseline, "r", encoding="utf-8") as f:
+                baseline = json.load(f)["results"]
+        except (OSError, json.JSONDecodeError, KeyError) as e:
+            print(f"[ERROR] Failed to load baseline: {e}", file=sys.stderr)
+            sys.exit(1)
+
+    work_dir = Path(args.work_dir).expanduser()
+    work_dir.mkdir(parents=True, exist_ok=True)
+    results = []
+    for size in sizes:
+        try:
+            manifest = ensure_corpus(work_dir, size, args.seed, args.verbose)
+            stages = benchmark_corpus(manifest, work_dir, args.repeat, args.verbose)
+        except (subprocess.CalledProcessError, RuntimeError) as e:
+            print(f"[ERROR] Benchmark failed for {format_size(size)}: {e}", file=sys.stderr)
+            sys.exit(1)
+        results.append({"size": size, "bytes": manifest["bytes"], "lines": manifest["lines"], "stages": stages})
+
+    if args.json:
+        print(json.dumps({"seed": args.seed, "python": sys.version.split()[0], "results": results}, indent=2))
+    else:
+        print_table(results)
+
+    if baseline is not None:
+        regressions = compare(results, baseline, args.threshold)
+        for regression in regressions:
+            print(f"[WARN] Regression: {regression}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,890 @@
+"""
+commit_analyzer.py - Group parsed session file operations into logical commits.
+
+Library half of analyze-commits.py. Groups are formed from user intent
+boundaries, timestamp gaps and file relationships; groups sharing files are
+merged so every file lands in exactly one commit.
+"""
+
+import glob
+import json
+import os
+import re
+import subprocess
+import sys
+from bisect import bisect_right
+from collections import defaultdict
+from itertools import accumulate
+from pathlib import Path
+from typing import Optional, TextIO, Union
+
+from pipeline_metrics import NO_METRICS, Metrics
+
+
+# Conventional commit type keywords
+TYPE_KEYWORDS = {
+    "feat": [
+        "add", "create", "implement", "new", "feature", "introduce",
+        "추가", "생성", "구현", "새로", "기능",
+    ],
+    "fix": [
+        "fix", "bug", "error", "resolve", "patch", "correct",
+        "수정", "버그", "에러", "고치", "오류",
+    ],
+    "refactor": [
+        "refactor", "restructure", "reorganize", "clean", "simplify", "move",
+        "리팩토", "정리", "개선", "구조",
+    ],
+    "style": [
+        "style", "format", "lint", "whitespace", "indent",
+        "스타일", "포맷", "정렬",
+    ],
+    "docs": [
+        "doc", "readme", "comment", "description",
+        "문서", "주석", "설명",
+    ],
+    "test": [
+        "test", "spec", "coverage", "assert",
+        "테스트", "검증",
+    ],
+    "chore": [
+        "config", "build", "ci", "dependency", "setup", "update",
+        "설정", "빌드", "의존",
+    ],
+}
+
+# (keyword, commit type) pairs flattened once, in TYPE_KEYWORDS priority order
+KEYWORD_TABLE = tuple(
+    (kw, commit_type) for commit_type, keywords in TYPE_KEYWORDS.items() for kw in keywords
+)
+
+# Explicit intent change indicators
+INTENT_CHANGE_MARKERS = (
+    "그리고", "다음으로", "이제", "다른",
+    "now", "next", "also", "another", "then",
+    "and then", "after that",
+)
+
+# Adjacent messages sharing less than this fraction of words change topic
+TOPIC_OVERLAP_THRESHOLD = 0.3
+
+# Shared files named in a merge reason before summarizing the rest
+MERGE_REASON_FILES = 3
+
+# Trailing request phrases stripped from commit messages, applied in order
+TRAILING_PHRASE_PATTERNS = tuple(
+    re.compile(rf"\s*{phrase}\s*$", flags=re.IGNORECASE)
+    for phrase in ("해줘", "해주세요", "please", "can you", "could you")
+)
+
+
+class FileOp:
+    """One file operation from parse-session.py output.
+
+    Slotted and with interned strings, since a long session yields one per
+    Edit/Write call and the same few paths recur. The triggering user message
+    is kept as its position in user_messages (message_pos) rather than a copy
+    of its text; None means there were no user messages.
+    """
+
+    __slots__ = ("path", "absolute_path", "tool", "change", "timestamp",
+                 "user_msg_index", "turn_index", "message_pos")
+
+    def __init__(self, path: str, absolute_path: str = "", tool: str = "", change: Optional[str] = "edit",
+                 timestamp: Optional[int] = None, user_msg_index: int = 0):
+        self.path = sys.intern(path)
+        self.absolute_path = sys.intern(absolute_path)
+        self.tool = sys.intern(tool)
+        self.change = sys.intern(change) if isinstance(change, str) else change
+        self.timestamp = timestamp
+        self.user_msg_index = user_msg_index
+        self.turn_index = 0
+        self.message_pos = None
+
+    @classmethod
+    def from_dict(cls, op: dict) -> "FileOp":
+        """Build a FileOp from a parse-session.py file_ops entry."""
+        return cls(op["path"], op.get("absolute_path", ""), op.get("tool", ""), op.get("change", "edit"),
+                   op.get("timestamp"), op.get("user_msg_index", 0))
+
+
+def to_file_ops(file_ops: list[Union[dict, FileOp]]) -> list[FileOp]:
+    """Convert parsed file op dicts to FileOp records (FileOps pass through)."""
+    return [op if isinstance(op, FileOp) else FileOp.from_dict(op) for op in file_ops]
+
+
+def message_text(user_messages: list[dict], op: FileOp) -> str:
+    """Return the text of the user message that triggered op."""
+    if op.message_pos is None:
+        return ""
+    return user_messages[op.message_pos].get("text", "")
+
+
+def detect_commit_type(user_context: str, files: list[dict]) -> str:
+    """Detect conventional commit type from user context and file paths."""
+    context_lower = user_context.lower()
+
+    # Check user context against keywords; the first match has top priority
+    for kw, commit_type in KEYWORD_TABLE:
+        if kw in context_lower:
+            return commit_type
+
+    # Infer from file paths
+    file_paths = [f["path"] for f in files]
+    path_str = " ".join(file_paths).lower()
+
+    if any(p for p in file_paths if "test" in p.lower() or "spec" in p.lower()):
+        return "test"
+    if any(p for p in file_paths if p.lower().endswith((".md", ".txt", ".rst"))):
+        return "docs"
+    if any(p for p in file_paths if "config" in p.lower() or p.lower().startswith(".")):
+        return "chore"
+
+    # Default
+    return "feat"
+
+
+def generate_commit_message(user_context: str, files: list[dict], commit_type: str) -> str:
+    """Generate a concise commit message from user context."""
+    # Clean up user context for message
+    msg = user_context.strip()
+
+    # Remove common prefixes
+    for pattern in TRAILING_PHRASE_PATTERNS:
+        msg = pattern.sub("", msg)
+
+    # Truncate if too long
+    if len(msg) > 72:
+        msg = msg[:69] + "..."
+
+    # If message is empty or too short, generate from files
+    if len(msg) < 5:
+        if len(files) == 1:
+            msg = f"update {files[0]['path']}"
+        else:
+            # Find common directory
+            dirs = set(f["path"].rsplit("/", 1)[0] if "/" in f["path"] else "." for f in files)
+            if len(dirs) == 1:
+                msg = f"update files in {dirs.pop()}"
+            else:
+                msg = f"update {len(files)} files"
+
+    return msg
+
+
+def map_ops_to_user_turns(file_ops: list[FileOp], user_messages: list[dict]) -> list[FileOp]:
+    """Map each file operation to the user message turn that triggered it.
+
+    An op belongs to the last message of the leading run of messages whose
+    index is at or before the op's user_msg_index. A running maximum of the
+    message indices is non-decreasing, so that run ends at a bisect point;
+    ops already in user_msg_index order are instead matched in one merge pass.
+    """
+    if not user_messages:
+        # No user messages, treat all ops as one turn
+        for op in file_ops:
+            op.turn_index = 0
+            op.message_pos = None
+        return file_ops
+
+    # prefix_max[i] is the largest index among user_messages[:i + 1]
+    prefix_max = list(accumulate((msg["index"] for msg in user_messages), max))
+    op_indices = [op.user_msg_index for op in file_ops]
+
+    if all(a <= b for a, b in zip(op_indices, op_indices[1:])):
+        counts = []
+        matched_count = 0
+        for op_msg_idx in op_indices:
+            while matched_count < len(prefix_max) and prefix_max[matched_count] <= op_msg_idx:
+                matched_count += 1
+            counts.append(matched_count)
+    else:
+        counts = [bisect_right(prefix_max, op_msg_idx) for op_msg_idx in op_indices]
+
+    for op, matched_count in zip(file_ops, counts):
+        if matched_count:
+            op.turn_index = user_messages[matched_count - 1]["index"]
+            op.message_pos = matched_count - 1
+        else:
+            op.turn_index = 0
+            op.message_pos = 0
+
+    return file_ops
+
+
+def adjacent_overlaps(texts: list[str]) -> list[Optional[float]]:
+    """Word overlap ratio of each adjacent text pair.
+
+    Entry i compares texts[i] with texts[i + 1]: shared words divided by the
+    smaller word count, or None if either text has no words. Each text is
+    split into a word set once and reused for both pairs it belongs to.
+    """
+    overlaps = []
+    prev_words = None
+    for text in texts:
+        curr_words = set(text.split())
+        if prev_words is not None:
+            if prev_words and curr_words:
+                overlaps.append(len(prev_words & curr_words) / min(len(prev_words), len(curr_words)))
+            else:
+                overlaps.append(None)
+        prev_words = curr_words
+    return overlaps
+
+
+def detect_intent_boundaries(user_messages: list[dict]) -> list[int]:
+    """Detect user intent change boundaries from message sequence.
+
+    Returns list of user message indices where intent changes.
+    """
+    if len(user_messages) <= 1:
+        return []
+
+    texts = [msg.get("text", "").lower() for msg in user_messages]
+    overlaps = adjacent_overlaps(texts)
+
+    boundaries = []
+    for i in range(1, len(user_messages)):
+        curr = texts[i]
+
+        has_marker = any(marker in curr for marker in INTENT_CHANGE_MARKERS)
+
+        # Topic change: check if texts are substantially different
+        overlap = overlaps[i - 1]
+        topic_change = overlap is None or overlap < TOPIC_OVERLAP_THRESHOLD
+
+        # Time gap check
+        prev_ts = user_messages[i - 1].get("timestamp")
+        curr_ts = user_messages[i].get("timestamp")
+        time_gap = False
+        if prev_ts and curr_ts:
+            gap_minutes = (curr_ts - prev_ts) / (1000 * 60)
+            time_gap = gap_minutes > 5  # 5 minute gap suggests new task
+
+        if has_marker or topic_change or time_gap:
+            boundaries.append(user_messages[i]["index"])
+
+    return boundaries
+
+
+def group_ops_by_turn(file_ops: list[FileOp], boundaries: list[int]) -> list[list[FileOp]]:
+    """Group file operations into commit groups based on turn boundaries."""
+    if not file_ops:
+        return []
+
+    # Sort ops by timestamp
+    sorted_ops = sorted(file_ops, key=lambda o: o.timestamp or 0)
+
+    groups = []
+    current_group = []
+    current_boundary_idx = 0
+
+    for op in sorted_ops:
+        turn_idx = op.turn_index
+
+        # Check if we've crossed a boundary
+        while current_boundary_idx < len(boundaries) and turn_idx >= boundaries[current_boundary_idx]:
+            if current_group:
+                groups.append(current_group)
+                current_group = []
+            current_boundary_idx += 1
+
+        current_group.append(op)
+
+    if current_group:
+        groups.append(current_group)
+
+    return groups
+
+
+def merge_reason(shared_files: list[str]) -> str:
+    """Describe why groups were merged, naming at most MERGE_REASON_FILES files."""
+    if len(shared_files) == 1:
+        return f"shared file: {shared_files[0]}"
+    reason = "shared files: " + ", ".join(shared_files[:MERGE_REASON_FILES])
+    if len(shared_files) > MERGE_REASON_FILES:
+        reason += f" and {len(shared_files) - MERGE_REASON_FILES} more"
+    return reason
+
+
+def merge_overlapping_groups(groups: list[list[FileOp]]) -> tuple[list[list[FileOp]], list[dict]]:
+    """Merge groups that share overlapping files.
+
+    Runs in time linear in ops plus groups: each file keeps the ascending
+    list of groups containing it, built in one pass, and merge reasons are
+    collected once per final merged group rather than per shared file.
+
+    Returns:
+        Tuple of (merged_groups, merge_info), where merge_info has one entry per
+        merged group built from several original groups: its 1-indexed position
+        in merged_groups, the original group numbers, the files they shared and
+        a reason.
+    """
+    if len(groups) <= 1:
+        return groups, []
+
+    # Build file -> ascending group indices mapping
+    file_to_groups = {}
+    for i, group in enumerate(groups):
+        for op in group:
+            indices = file_to_groups.get(op.path)
+            if indices is None:
+                file_to_groups[op.path] = [i]
+            elif indices[-1] != i:
+                indices.append(i)
+
+    # Find groups to merge using union-find
+    parent = list(range(len(groups)))
+
+    def find(x):
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    # Union every group of a file into the first one's root. That root stays
+    # a root while the file's groups are attached to it, so it is looked up once.
+    shared_files = []
+    for filepath, indices in file_to_groups.items():
+        if len(indices) > 1:
+            root = find(indices[0])
+            for i in indices[1:]:
+                other = parent[i]
+                if parent[other] != other:
+                    other = find(other)
+                if other != root:
+                    parent[other] = root
+            shared_files.append(filepath)
+
+    # Collect merged groups
+    members = defaultdict(list)
+    for i in range(len(groups)):
+        members[find(i)].append(i)
+
+    # Deduplicate ops within merged groups (keep latest op per file)
+    result = []
+    position = {}
+    for root in sorted(members):
+        position[root] = len(result)
+        latest = {}
+        for i in members[root]:
+            for op in groups[i]:
+                kept = latest.get(op.path)
+                if kept is None or (op.timestamp or 0) > (kept.timestamp or 0):
+                    latest[op.path] = op
+        result.append(list(latest.values()))
+
+    # One merge entry per merged group, listing the files that caused it
+    component_files = defaultdict(list)
+    for filepath in shared_files:
+        component_files[find(file_to_groups[filepath][0])].append(filepath)
+    merge_info = []
+    for root in sorted(component_files):
+        merge_info.append({
+            "group": position[root] + 1,
+            "original": [i + 1 for i in members[root]],  # 1-indexed for display
+            "shared_files": component_files[root],
+            "reason": merge_reason(component_files[root]),
+        })
+
+    return result, merge_info
+
+
+def git_changed_paths(project_path: str) -> Optional[set[str]]:
+    """Return project-relative paths git would stage, from one status call.
+
+    Covers modified, staged, deleted and untracked files of the whole work
+    tree with a single `git status`, whatever the number of candidate files
+    (plus one rev-parse for the project's prefix in the repository).
+    Returns None, with a warning, if git is unavailable or project_path is not
+    in a work tree.
+    """
+    try:
+        prefix = subprocess.run(
+            ["git", "-C", project_path, "rev-parse", "--show-prefix"],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+        status = subprocess.run(
+            ["git", "-C", project_path, "status", "--porcelain", "-z", "--untracked-files=all", "--no-renames"],
+            capture_output=True, check=True,
+        ).stdout
+    except (OSError, subprocess.CalledProcessError):
+        print(f"[WARN] Skipping git check: {project_path} is not a git work tree (or git is unavailable)",
+              file=sys.stderr)
+        return None
+
+    changed = set()
+    for entry in status.decode("utf-8", "surrogateescape").split("\0"):
+        # Entries are "XY path"; paths are relative to the repository root
+        path = entry[3:].rstrip("/")
+        if path.startswith(prefix) and len(path) > len(prefix):
+            changed.add(path[len(prefix):])
+    return changed
+
+
+def drop_unchanged_files(groups: list[list[FileOp]], changed_paths: set[str]) -> tuple[list[list[FileOp]], list[str]]:
+    """Drop ops on files git reports unchanged, then groups left empty.
+
+    A file also counts as changed if a parent directory is reported (e.g. a
+    modified submodule). Returns (kept groups, sorted dropped paths).
+    """
+    def is_changed(path: str) -> bool:
+        while path:
+            if path in changed_paths:
+                return True
+            path = os.path.dirname(path)
+        return False
+
+    verdicts = {}
+    kept_groups = []
+    for group in groups:
+        kept = []
+        for op in group:
+            changed = verdicts.get(op.path)
+            if changed is None:
+                changed = verdicts[op.path] = is_changed(op.path)
+            if changed:
+                kept.append(op)
+        if kept:
+            kept_groups.append(kept)
+    return kept_groups, sorted(path for path, changed in verdicts.items() if not changed)
+
+
+def build_commit_group(index: int, group_ops: list[FileOp], user_messages: list[dict]) -> dict:
+    """Build one commit group structure with its message and type."""
+    # Determine user context from the first operation that has one
+    user_context = ""
+    for op in group_ops:
+        user_context = message_text(user_messages, op)
+        if user_context:
+            break
+
+    # Build file list
+    files = []
+    seen_paths = set()
+    for op in sorted(group_ops, key=lambda o: o.path):
+        if op.path not in seen_paths:
+            seen_paths.add(op.path)
+            files.append({
+                "path": op.path,
+                "change": op.change,
+            })
+
+    # Detect type and generate message
+    commit_type = detect_commit_type(user_context, files)
+    message = generate_commit_message(user_context, files, commit_type)
+
+    return {
+        "index": index,
+        "type": commit_type,
+        "message": message,
+        "files": files,
+        "user_context": user_context[:200],  # Truncate for display
+    }
+
+
+def build_commit_groups(groups: list[list[FileOp]], user_messages: list[dict]) -> list[dict]:
+    """Build final commit group structures with messages and types."""
+    return [build_commit_group(i + 1, group_ops, user_messages) for i, group_ops in enumerate(groups)]
+
+
+class IncrementalAnalysis:
+    """Commit grouping kept up to date while a session is still being written.
+
+    add() takes the user messages and file ops parsed since the previous call
+    and returns only the commit groups that changed. Each step of
+    analyze_session_data() is advanced rather than recomputed:
+
+    - new ops are mapped to turns and new message pairs checked for intent
+      boundaries;
+    - the group_ops_by_turn() cursor extends the last group or opens new ones;
+    - a union-find over initial groups merges components on shared files, and
+      each component keeps its merge_overlapping_groups() dedup (first
+      occurrence of every path and the op kept for it) so a merge combines
+      two dicts instead of re-walking their ops.
+
+    That holds while ops arrive in timestamp order, which the session log
+    guarantees in practice. An op sorting before an earlier one, or the first
+    user message arriving after ops (which remaps those ops), rebuilds the
+    grouping from all ops instead. A component is identified by the 1-based
+    number of its earliest initial group (group_id), so its id is stable
+    until it is merged into an earlier component.
+    """
+
+    def __init__(self):
+        self.user_messages = []
+        self.file_ops = []  # In arrival order
+        self.boundaries = []
+        self.emitted = {}  # group_id -> commit group last returned
+        self._reset_groups()
+
+    def _reset_groups(self) -> None:
+        self.groups = []  # Initial groups, as in group_ops_by_turn()
+        self.boundary_pos = 0
+        self.group_open = False
+        self.last_key = None
+        self.parent = []
+        # root -> {"first": earliest group, "members": [...], "files": {path: [first_pos, op, op_pos]}}
+        self.components = {}
+        self.path_groups = {}  # path -> initial groups containing it, ascending
+
+    def _find(self, x: int) -> int:
+        parent = self.parent
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    def _union(self, a: int, b: int) -> int:
+        """Merge the components of roots a and b; return the surviving root."""
+        big, small = self.components[a], self.components[b]
+        if len(big["files"]) < len(small["files"]):
+            a, b = b, a
+            big, small = small, big
+        self.parent[b] = a
+        del self.components[b]
+        big["first"] = min(big["first"], small["first"])
+        big["members"].extend(small["members"])
+        files = big["files"]
+        for path, (first_pos, op, op_pos) in small["files"].items():
+            kept = files.get(path)
+            if kept is None:
+                files[path] = [first_pos, op, op_pos]
+                continue
+            kept[0] = min(kept[0], first_pos)
+            # Latest timestamp wins; on a tie, the op occurring first
+            ts, kept_ts = op.timestamp or 0, kept[1].timestamp or 0
+            if ts > kept_ts or (ts == kept_ts and op_pos < kept[2]):
+                kept[1], kept[2] = op, op_pos
+        return a
+
+    def _place(self, op: FileOp) -> int:
+        """Add one op (in timestamp order) to the groups; return its component root."""
+        while self.boundary_pos < len(self.boundaries) and op.turn_index >= self.boundaries[self.boundary_pos]:
+            self.group_open = False
+            self.boundary_pos += 1
+        if not self.group_open:
+            index = len(self.groups)
+            self.groups.append([])
+            self.parent.append(index)
+            self.components[index] = {"first": index, "members": [index], "files": {}}
+            self.group_open = True
+        index = len(self.groups) - 1
+        group = self.groups[index]
+        op_pos = (index, len(group))
+        group.append(op)
+        self.last_key = op.timestamp or 0
+
+        root = self._find(index)
+        holders = self.path_groups.setdefault(op.path, [])
+        if not holders or holders[-1] != index:
+            if holders:
+                other = self._find(holders[0])
+                if other != root:
+                    root = self._union(root, other)
+            holders.append(index)
+
+        files = self.components[root]["files"]
+        kept = files.get(op.path)
+        if kept is None:
+            files[op.path] = [op_pos, op, op_pos]
+        elif (op.timestamp or 0) > (kept[1].timestamp or 0):
+            kept[1], kept[2] = op, op_pos
+        return root
+
+    def _commit_group(self, root: int) -> dict:
+        """Build the current commit group of one component."""
+        component = self.components[root]
+        # Paths in order of first occurrence, as merge_overlapping_groups() sees them
+        paths = sorted(component["files"], key=lambda path: component["files"][path][0])
+        if len(self.groups) == 1:
+            # merge_overlapping_groups() leaves a lone group undeduplicated
+            group_ops = self.groups[0]
+        else:
+            group_ops = [component["files"][path][1] for path in paths]
+        commit_group = build_commit_group(component["first"] + 1, group_ops, self.user_messages)
+        del commit_group["index"]
+        commit_group["group_id"] = component["first"] + 1
+        commit_group["merged_from"] = sorted(i + 1 for i in component["members"])
+        shared_files = [path for path in paths if len(self.path_groups[path]) > 1]
+        if shared_files:
+            commit_group["shared_files"] = shared_files
+            commit_group["reason"] = merge_reason(shared_files)
+        return commit_group
+
+    def add(self, user_messages: list[dict], file_ops: list[Union[dict, FileOp]]) -> list[dict]:
+        """Apply newly parsed messages and ops; return the changed group records.
+
+        Records are {"type": "group", "group": commit group} for a new or
+        changed group and {"type": "removed", "group_id": ...} for a group
+        merged into another one. Commit groups carry group_id and merged_from
+        (initial group numbers) instead of index, plus shared_files and reason
+        when merged.
+        """
+        first_messages = not self.user_messages and user_messages
+        if user_messages:
+            window = self.user_messages[-1:] + user_messages
+            self.boundaries.extend(detect_intent_boundaries(window))
+            self.user_messages.extend(user_messages)
+
+        new_ops = map_ops_to_user_turns(to_file_ops(file_ops), self.user_messages)
+        self.file_ops.extend(new_ops)
+
+        keys = [op.timestamp or 0 for op in new_ops]
+        in_order = all(a <= b for a, b in zip(keys, keys[1:]))
+        if in_order and keys and self.last_key is not None:
+            in_order = keys[0] >= self.last_key
+
+        changed = set()
+        if len(self.groups) == 1:
+            changed.add(0)  # Deduplicated from now on if a second group opens
+        if (first_messages and len(self.file_ops) > len(new_ops)) or not in_order:
+            map_ops_to_user_turns(self.file_ops, self.user_messages)
+            self._reset_groups()
+            for op in sorted(self.file_ops, key=lambda o: o.timestamp or 0):
+                self._place(op)
+            changed.update(self.components)
+        else:
+            for op in new_ops:
+                changed.add(self._place(op))
+
+        deltas = []
+        live_ids = {component["first"] + 1 for component in self.components.values()}
+        for group_id in sorted(set(self.emitted) - live_ids):
+            del self.emitted[group_id]
+            deltas.append({"type": "removed", "group_id": group_id})
+        for root in sorted({self._find(root) for root in changed}, key=lambda r: self.components[r]["first"]):
+            commit_group = self._commit_group(root)
+            if self.emitted.get(commit_group["group_id"]) != commit_group:
+                self.emitted[commit_group["group_id"]] = commit_group
+                deltas.append({"type": "group", "group": commit_group})
+        return deltas
+
+
+def load_session_data(stream: TextIO) -> dict:
+    """Load parse-session.py output in either JSON or NDJSON (--format ndjson) form.
+
+    NDJSON is recognized by its leading "session" record and consumed line by
+    line as it arrives; snapshot records are dropped since they are not used
+    for grouping. Either way, file_ops are returned as FileOp records.
+    """
+    first_line = stream.readline()
+    try:
+        header = json.loads(first_line)
+    except json.JSONDecodeError:
+        header = None
+
+    if not (isinstance(header, dict) and header.get("type") == "session"):
+        if isinstance(header, dict):
+            session_data = header  # Compact single-line JSON document
+        else:
+            session_data = json.loads(first_line + stream.read())
+        if isinstance(session_data, dict) and "file_ops" in session_data:
+            session_data["file_ops"] = to_file_ops(session_data["file_ops"])
+        return session_data
+
+    session_data = {
+        "session_id": header.get("session_id"),
+        "project_path": header.get("project_path"),
+        "user_messages": [],
+        "file_ops": [],
+    }
+    for line in stream:
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        record_type = record.pop("type", None)
+        if record_type == "file_op":
+            session_data["file_ops"].append(FileOp.from_dict(record))
+        elif record_type == "user_message":
+            session_data["user_messages"].append(record)
+    return session_data
+
+
+def analyze_session_data(file_ops: list[Union[dict, FileOp]], user_messages: list[dict],
+                         verbose: bool = False, changed_paths: Optional[set[str]] = None,
+                         metrics: Metrics = NO_METRICS) -> dict:
+    """Run the grouping pipeline over parsed file ops and user messages.
+
+    file_ops may be parse-session.py dicts or FileOp records. If changed_paths
+    (see git_changed_paths()) is given, files not in it are dropped before
+    groups are merged, so reverted edits neither become commits nor merge
+    groups. Each step is timed as a metrics stage (map, boundaries, group,
+    drop, merge, build). Returns the commit_groups / merged_groups / summary
+    document that analyze-commits.py prints.
+    """
+    if verbose:
+        print(f"[VERBOSE] Analyzing {len(file_ops)} file ops, {len(user_messages)} user messages", file=sys.stderr)
+
+    # Step 1: Map ops to user turns
+    with metrics.stage("map"):
+        file_ops = map_ops_to_user_turns(to_file_ops(file_ops), user_messages)
+
+    # Step 2: Detect intent boundaries
+    with metrics.stage("boundaries"):
+        boundaries = detect_intent_boundaries(user_messages)
+    if verbose:
+        print(f"[VERBOSE] Detected {len(boundaries)} intent boundaries at indices: {boundaries}", file=sys.stderr)
+
+    # Step 3: Group by turn boundaries
+    with metrics.stage("group"):
+        groups = group_ops_by_turn(file_ops, boundaries)
+    if verbose:
+        print(f"[VERBOSE] Initial groups: {len(groups)}", file=sys.stderr)
+        for i, g in enumerate(groups):
+            files = set(op.path for op in g)
+            print(f"[VERBOSE]   Group {i+1}: {len(g)} ops, files: {files}", file=sys.stderr)
+
+    # Step 3b: Drop files with nothing to commit
+    dropped_paths = []
+    if changed_paths is not None:
+        with metrics.stage("drop"):
+            groups, dropped_paths = drop_unchanged_files(groups, changed_paths)
+        if verbose:
+            print(f"[VERBOSE] Dropped {len(dropped_paths)} unchanged files: {dropped_paths}", file=sys.stderr)
+
+    # Step 4: Merge overlapping groups
+    with metrics.stage("merge"):
+        merged_groups, merge_info = merge_overlapping_groups(groups)
+    if verbose and merge_info:
+        print(f"[VERBOSE] {len(merge_info)} groups merged from overlapping groups", file=sys.stderr)
+        for info in merge_info:
+            print(f"[VERBOSE]   Group {info['group']} merged from groups {info['original']}: {info['reason']}",
+                  file=sys.stderr)
+
+    # Step 5: Build commit groups
+    with metrics.stage("build"):
+        commit_groups = build_commit_groups(merged_groups, user_messages)
+    metrics.count("file_ops", len(file_ops))
+    metrics.count("user_messages", len(user_messages))
+    metrics.count("intent_boundaries", len(boundaries))
+    metrics.count("initial_groups", len(groups))
+
+    # Result
+    result = {
+        "commit_groups": commit_groups,
+        "merged_groups": merge_info,
+        "summary": {
+            "total_groups": len(commit_groups),
+            "merged_count": len(merge_info),
+            "total_files": sum(len(g["files"]) for g in commit_groups),
+        },
+    }
+    if changed_paths is not None:
+        result["dropped_files"] = dropped_paths
+        result["summary"]["dropped_count"] = len(dropped_paths)
+
+    if verbose:
+        print(f"[VERBOSE] Output: {len(commit_groups)} commit groups, {len(merge_info)} merges", file=sys.stderr)
+
+    return result
+
+
+# Parse output files picked up when a batch source is a directory
+BATCH_FILE_SUFFIXES = (".json", ".ndjson", ".jsonl")
+
+
+def batch_tasks(source: str) -> list[tuple]:
+    """List the sessions of a batch source as tasks for analyze_session_record().
+
+    source is a directory or glob of parse-session.py outputs (JSON or NDJSON,
+    one session per file), or an NDJSON stream of one session per line as
+    written by parse-session.py --all-sessions: a file, or "-" for stdin.
+    Raises FileNotFoundError if source matches nothing.
+    """
+    if source == "-":
+        return [("record", f"<stdin>:{n}", line) for n, line in enumerate(sys.stdin, 1) if line.strip()]
+    path = Path(source)
+    if path.is_dir():
+        files = sorted(p for p in path.iterdir() if p.is_file() and p.suffix in BATCH_FILE_SUFFIXES)
+        return [("file", str(p)) for p in files]
+    if path.is_file():
+        with open(path, "r", encoding="utf-8") as f:
+            lines = [(n, line) for n, line in enumerate(f, 1) if line.strip()]
+        try:
+            first = json.loads(lines[0][1]) if lines else None
+        except json.JSONDecodeError:
+            first = None
+        if not isinstance(first, dict) or first.get("type") == "session":
+            return [("file", str(path))]  # A single session's JSON or --format ndjson output
+        return [("record", f"{path}:{n}", line) for n, line in lines]
+    files = sorted(glob.glob(source))
+    if not files:
+        raise FileNotFoundError(2, "No parse outputs found", source)
+    return [("file", f) for f in files if os.path.isfile(f)]
+
+
+def analyze_session_record(task: tuple) -> dict:
+    """Analyze one session for batch mode; runs in a worker process.
+
+    Failures, including sessions that parse-session.py itself failed on, are
+    reported in the record instead of raised, so one broken session does not
+    abort the batch.
+    """
+    kind, source = task[0], task[1]
+    record = {"type": "session", "session_id": None, "source": source}
+    try:
+        if kind == "file":
+            with open(source, "r", encoding="utf-8") as f:
+                session_data = load_session_data(f)
+            record["session_id"] = Path(source).stem
+        else:
+            session_data = json.loads(task[2])
+        if not isinstance(session_data, dict):
+            raise ValueError("not a parse-session.py document")
+        if kind == "record":
+            session_data["file_ops"] = to_file_ops(session_data.get("file_ops", []))
+        record["session_id"] = session_data.get("session_id") or record["session_id"]
+        if "error" in session_data:
+            raise ValueError(f"parse failed: {session_data['error']}")
+        record.update(analyze_session_data(session_data.get("file_ops", []),
+                                           session_data.get("user_messages", [])))
+    except Exception as e:  # noqa: BLE001 - isolate per-session failures
+        record["error"] = f"{type(e).__name__}: {e}"
+    return record
+
+
+def run_batch(tasks: list[tuple], workers: int, verbose: bool = False) -> int:
+    """Analyze many sessions across a process pool, streaming one NDJSON record per session.
+
+    Records are written in task order regardless of which worker finishes
+    first, followed by one {"type": "aggregate"} record totalling groups,
+    merges and files over the sessions analyzed. Returns the number of
+    sessions that failed.
+    """
+    aggregate = {
+        "type": "aggregate",
+        "sessions": len(tasks),
+        "failed": 0,
+        "total_groups": 0,
+        "merged_count": 0,
+        "total_files": 0,
+    }
+
+    if workers <= 1 or len(tasks) <= 1:
+        results = map(analyze_session_record, tasks)
+        executor = None
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+        executor = ProcessPoolExecutor(max_workers=workers)
+        results = executor.map(analyze_session_record, tasks, chunksize=max(1, len(tasks) // (workers * 4)))
+
+    try:
+        for record in results:
+            if "error" in record:
+                aggregate["failed"] += 1
+                print(f"[ERROR] Failed to analyze {record['source']}: {record['error']}", file=sys.stderr)
+            else:
+                for key in ("total_groups", "merged_count", "total_files"):
+                    aggregate[key] += record["summary"][key]
+                if verbose:
+                    print(f"[VERBOSE] Session {record['session_id']}: {record['summary']['total_groups']} groups",
+                          file=sys.stderr)
+            sys.stdout.write(json.dumps(record, ensure_ascii=False) + "\n")
+            sys.stdout.flush()
+    finally:
+        if executor:
+            executor.shutdown()
+
+    sys.stdout.write(json.dumps(aggregate, ensure_ascii=False) + "\n")
+    return aggregate["failed"]
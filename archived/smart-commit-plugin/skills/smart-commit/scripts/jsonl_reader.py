@@ -0,0 +1,160 @@
+"""
+jsonl_reader.py - Memory-mapped line reader for Claude Code JSONL files.
+
+Shared by parse-session.py (smart-commit-plugin) and worktrace.py
+(worktrace-plugin); each plugin ships its own copy, keep them in sync.
+
+Lines are split on raw bytes of a read-only mmap, so callers can inspect
+(and skip) a line before paying for UTF-8 and JSON decoding. Entries are
+yielded lazily, so a file is streamed instead of held in memory.
+"""
+
+import json
+import mmap
+import os
+import stat
+from pathlib import Path
+from typing import Callable, Iterator, Optional
+
+_decoder = json.JSONDecoder()
+
+# history.jsonl is appended in time order, but entries of concurrent sessions
+# can land slightly out of order; readers that stop early tolerate this much.
+HISTORY_ORDER_SLACK_MS = 10 * 60 * 1000
+
+# Consumed pages are dropped from the mapping every RELEASE_CHUNK bytes so the
+# resident set stays bounded on large files (the page cache keeps them).
+RELEASE_CHUNK = 16 * 1024 * 1024
+_can_release = hasattr(mmap, "MADV_DONTNEED") and hasattr(mmap.mmap, "madvise")
+
+
+def _map(f) -> Optional[mmap.mmap]:
+    """Map an open binary file read-only, or return None if it cannot be.
+
+    Empty files, pipes, FIFOs and character devices such as /dev/null cannot
+    be mapped; callers fall back to reading the file object sequentially.
+    """
+    try:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (ValueError, OSError):
+        return None
+
+
+def iter_lines(filepath: Path, start: int = 0) -> Iterator[tuple[int, bytes]]:
+    """Yield (offset, line) for each line from byte offset start.
+
+    Lines keep their trailing newline, so an unterminated last line can be
+    told apart by the caller. The mapping covers the file size at open time;
+    bytes appended while iterating are not seen. Files that cannot be mapped
+    (pipes, FIFOs, /dev/null) are read sequentially instead.
+    """
+    with open(filepath, "rb") as f:
+        mm = _map(f)
+        if mm is None:
+            pos = 0
+            for line in f:
+                if pos >= start:
+                    yield pos, line
+                pos += len(line)
+            return
+        with mm:
+            mm.seek(start)
+            pos = start
+            released = start - start % mmap.PAGESIZE
+            for line in iter(mm.readline, b""):
+                yield pos, line
+                pos += len(line)
+                if _can_release and pos - released >= RELEASE_CHUNK:
+                    boundary = pos - pos % mmap.PAGESIZE
+                    mm.madvise(mmap.MADV_DONTNEED, released, boundary - released)
+                    released = boundary
+
+
+def iter_lines_reversed(filepath: Path) -> Iterator[bytes]:
+    """Yield lines from the end of the file backwards.
+
+    Only the pages holding the lines actually consumed are read, so stopping
+    early costs time proportional to the distance from EOF, not file size.
+    Files that cannot be mapped are read whole and their lines reversed.
+    """
+    with open(filepath, "rb") as f:
+        mm = _map(f)
+        if mm is None:
+            yield from reversed(f.readlines())
+            return
+        with mm:
+            end = len(mm)
+            while end > 0:
+                # Search before end - 1 so a line's own trailing newline is kept
+                start = mm.rfind(b"\n", 0, end - 1) + 1
+                yield mm[start:end]
+                end = start
+
+
+def bisect_lines(filepath: Path, key: Callable[[bytes], Optional[float]], target: float,
+                 probe: int = 1) -> int:
+    """Return the offset of the first line whose key is >= target.
+
+    The file must be sorted by key (e.g. an append-only log keyed by
+    timestamp). key(line) returns None for lines without a key (blank,
+    malformed); the search moves past them to the next keyed line, so only
+    O(log n) lines are read and decoded. Each step compares the largest key
+    of probe consecutive keyed lines, so with probe=2 a single line far out
+    of order cannot send the search past the target. Returns the file size
+    if every key is below target, and 0 for files that cannot be searched
+    (pipes, FIFOs, /dev/null), which callers then scan from the start. Those
+    are not opened, so a pipe's data is left for that scan.
+    """
+    if not stat.S_ISREG(os.stat(filepath).st_mode):
+        return 0
+    with open(filepath, "rb") as f:
+        mm = _map(f)
+        if mm is None:
+            return 0  # Empty file cannot be mapped
+        with mm:
+            lo, hi = 0, len(mm)
+            while lo < hi:
+                # First keyed line starting in the line that holds the midpoint
+                pos = mm.rfind(b"\n", lo, (lo + hi) // 2) + 1 or lo
+                mid = pos
+                value = None
+                keyed = 0
+                while pos < hi and keyed < probe:
+                    end = mm.find(b"\n", pos, hi)
+                    end = hi if end < 0 else end + 1
+                    line_key = key(mm[pos:end])
+                    if line_key is not None:
+                        keyed += 1
+                        value = line_key if value is None else max(value, line_key)
+                    pos = end
+                if value is None or value >= target:
+                    hi = mid
+                else:
+                    lo = end
+            return lo
+
+
+def loads_line(line: bytes):
+    """Decode one raw JSONL line.
+
+    Faster than json.loads(bytes), which re-detects the encoding per call.
+    Raises ValueError for malformed JSON or invalid UTF-8.
+    """
+    return _decoder.decode(line.decode("utf-8"))
+
+
+def iter_jsonl(filepath: Path, reverse: bool = False) -> Iterator[dict]:
+    """Lazily yield entries of a JSONL file, skipping blank and malformed lines.
+
+    With reverse=True, entries are yielded from the last line backwards.
+    """
+    if not filepath.exists():
+        return
+    lines = iter_lines_reversed(filepath) if reverse else (line for _, line in iter_lines(filepath))
+    for line in lines:
+        if line.isspace():
+            continue
+        try:
+            yield loads_line(line)
+        except ValueError:
+            continue
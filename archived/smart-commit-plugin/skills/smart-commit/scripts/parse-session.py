@@ -4,9 +4,13 @@ parse-session.py - Parse Claude Code session JSONL to extract file operations an
 
 Reads session conversation data from ~/.claude/projects/{encoded-path}/{sessionId}.jsonl
 and extracts structured information about file edits, writes, and user intent.
+Parsing lives in session_parser.py; this script is the command-line wrapper.
 
-Output: JSON to stdout with session_id, project_path, user_messages, file_ops, snapshots.
+Output: JSON to stdout with session_id, project_path, user_messages, file_ops, snapshots,
+snapshot_blobs
+(or, with --format ndjson, a "session" header followed by one typed record per item).
 Errors: [ERROR] and [HINT] messages to stderr.
+With --profile / --metrics-json, per-stage times and line counts (see pipeline_metrics.py).
 """
 
 import argparse
@@ -15,220 +19,19 @@ import os
 import re
 import sys
 from pathlib import Path
-from typing import Optional
-
-
-def encode_project_path(path: str) -> str:
-    """Encode project path to Claude's directory name format.
-
-    Reused from worktrace-plugin pattern.
-    e.g., /Users/foo/bar → -Users-foo-bar
-    """
-    return re.sub(r"[/.]", "-", path)
-
-
-def load_jsonl(filepath: Path) -> list[dict]:
-    """Safely load a JSONL file, skipping malformed lines."""
-    entries = []
-    if not filepath.exists():
-        return entries
-    with open(filepath, "r", encoding="utf-8") as f:
-        for line in f:
-            line = line.strip()
-            if line:
-                try:
-                    entries.append(json.loads(line))
-                except json.JSONDecodeError:
-                    continue
-    return entries
-
-
-def find_latest_session(project_path: str, history_file: Path) -> Optional[str]:
-    """Find the most recent session ID for a project from history.jsonl."""
-    entries = load_jsonl(history_file)
-    # history.jsonl entries have project paths and session references
-    # Filter entries matching our project
-    matching = []
-    for entry in entries:
-        entry_project = entry.get("project", "")
-        if entry_project and os.path.normpath(entry_project) == os.path.normpath(project_path):
-            matching.append(entry)
-
-    if not matching:
-        return None
-
-    # Sort by timestamp descending, return latest session_id
-    matching.sort(key=lambda e: e.get("timestamp", 0), reverse=True)
-    return matching[0].get("sessionId") or matching[0].get("session_id")
-
-
-def find_session_from_projects_dir(project_path: str) -> Optional[str]:
-    """Find latest session by checking the projects directory directly."""
-    encoded = encode_project_path(project_path)
-    sessions_dir = Path.home() / ".claude" / "projects" / encoded
-
-    if not sessions_dir.exists():
-        return None
-
-    # Find most recently modified session JSONL
-    session_files = []
-    for f in sessions_dir.glob("*.jsonl"):
-        # Only UUID-named session files
-        if re.match(r"^[a-f0-9]{8}-[a-f0-9]{4}-[a-f0-9]{4}-[a-f0-9]{4}-[a-f0-9]{12}$", f.stem):
-            session_files.append(f)
-
-    if not session_files:
-        return None
-
-    # Sort by modification time, latest first
-    session_files.sort(key=lambda f: f.stat().st_mtime, reverse=True)
-    return session_files[0].stem
-
-
-def parse_timestamp(ts) -> Optional[int]:
-    """Parse timestamp to epoch milliseconds. Handles both int and ISO string."""
-    if isinstance(ts, (int, float)):
-        return int(ts)
-    if isinstance(ts, str):
-        try:
-            from datetime import datetime
-            dt = datetime.fromisoformat(ts.replace("Z", "+00:00"))
-            return int(dt.timestamp() * 1000)
-        except (ValueError, TypeError):
-            return None
-    return None
-
-
-def extract_tool_calls(message: dict) -> list[dict]:
-    """Extract tool use blocks from an assistant message."""
-    tools = []
-    content = message.get("content", [])
-    if isinstance(content, str):
-        return tools
-    for block in content:
-        if isinstance(block, dict) and block.get("type") == "tool_use":
-            tools.append(block)
-    return tools
-
-
-def extract_file_ops_from_tool(tool: dict, project_path: str) -> Optional[dict]:
-    """Extract file operation info from a tool_use block."""
-    name = tool.get("name", "")
-    inp = tool.get("input", {})
-
-    if name not in ("Edit", "Write", "NotebookEdit"):
-        return None
-
-    file_path = inp.get("file_path", "")
-    if not file_path:
-        return None
-
-    # Filter out files outside the project
-    norm_project = os.path.normpath(project_path)
-    norm_file = os.path.normpath(file_path)
-    if not norm_file.startswith(norm_project):
-        return None
-
-    # Determine change type
-    if name == "Write":
-        change = "write"
-    elif name == "Edit":
-        change = "edit"
-    elif name == "NotebookEdit":
-        change = "notebook_edit"
-    else:
-        change = "unknown"
-
-    # Make path relative to project
-    rel_path = os.path.relpath(norm_file, norm_project)
-
-    return {
-        "path": rel_path,
-        "absolute_path": file_path,
-        "tool": name,
-        "change": change,
-    }
-
-
-def extract_user_text(message: dict) -> Optional[str]:
-    """Extract text content from a user message."""
-    content = message.get("content", "")
-    if isinstance(content, str):
-        return content.strip() if content.strip() else None
-    if isinstance(content, list):
-        texts = []
-        for block in content:
-            if isinstance(block, dict) and block.get("type") == "text":
-                texts.append(block.get("text", ""))
-            elif isinstance(block, str):
-                texts.append(block)
-        combined = " ".join(texts).strip()
-        return combined if combined else None
-    return None
-
-
-def parse_session(session_file: Path, project_path: str, verbose: bool = False) -> dict:
-    """Parse a session JSONL file and extract structured data."""
-    entries = load_jsonl(session_file)
-
-    user_messages = []
-    file_ops = []
-    snapshots = []
-    current_timestamp = None
-    user_msg_index = 0
-
-    for entry in entries:
-        entry_type = entry.get("type")
-        ts = parse_timestamp(entry.get("timestamp"))
-
-        if ts:
-            current_timestamp = ts
-
-        # User messages
-        if entry_type == "human" or entry.get("role") == "human":
-            text = extract_user_text(entry)
-            if text:
-                # Skip system-generated messages
-                if text.startswith("<system-reminder>") or text.startswith("{\"type\":"):
-                    continue
-                user_messages.append({
-                    "index": user_msg_index,
-                    "timestamp": current_timestamp,
-                    "text": text[:500],  # Truncate long messages
-                })
-                user_msg_index += 1
-                if verbose:
-                    preview = text[:80].replace("\n", " ")
-                    print(f"[VERBOSE] User message {user_msg_index}: {preview}", file=sys.stderr)
-
-        # Assistant messages with tool calls
-        elif entry_type == "assistant" or entry.get("role") == "assistant":
-            tools = extract_tool_calls(entry)
-            for tool in tools:
-                op = extract_file_ops_from_tool(tool, project_path)
-                if op:
-                    op["timestamp"] = current_timestamp
-                    op["user_msg_index"] = max(0, user_msg_index - 1)
-                    file_ops.append(op)
-                    if verbose:
-                        print(f"[VERBOSE] File op: {op['change']} {op['path']}", file=sys.stderr)
-
-        # File history snapshots
-        elif entry_type == "file-history-snapshot":
-            snapshot_data = entry.get("data", {})
-            if snapshot_data:
-                snapshots.append({
-                    "timestamp": current_timestamp,
-                    "files": snapshot_data,
-                })
-
-    return {
-        "session_id": session_file.stem,
-        "project_path": project_path,
-        "user_messages": user_messages,
-        "file_ops": file_ops,
-        "snapshots": snapshots,
-    }
+
+from session_parser import (
+    RECORD_TYPES,
+    SESSION_ID_PATTERN,
+    encode_project_path,
+    find_latest_session,
+    find_project_sessions,
+    find_session_from_projects_dir,
+    parse_session,
+    parse_since,
+    run_batch,
+)
+from pipeline_metrics import NO_METRICS, Metrics, write_metrics
 
 
 def main():
@@ -252,8 +55,58 @@ def main():
         action="store_true",
         help="Print detailed parsing log to stderr"
     )
+    parser.add_argument(
+        "--checkpoint",
+        action="store_true",
+        help="Resume from the last parse checkpoint and decode only newly appended lines"
+    )
+    parser.add_argument(
+        "--strict",
+        action="store_true",
+        help="Decode every line instead of prefiltering irrelevant lines by raw bytes"
+    )
+    parser.add_argument(
+        "--no-snapshots",
+        action="store_true",
+        help="Skip file-history snapshots (omits snapshots and snapshot_blobs data)"
+    )
+    parser.add_argument(
+        "--all-sessions",
+        action="store_true",
+        help="Parse every session of the project and stream one NDJSON record per session"
+    )
+    parser.add_argument(
+        "--since",
+        type=str,
+        help="With --all-sessions: only sessions modified since YYYY-MM-DD or a relative age (e.g. 7d, 12h)"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="With --all-sessions: number of worker processes (default: CPU count)"
+    )
+    parser.add_argument(
+        "--format",
+        choices=("json", "ndjson"),
+        default="json",
+        help="Output a single JSON document (default) or stream one typed NDJSON record "
+             "per user message, file op, snapshot and snapshot blob"
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Print wall/CPU time per stage, line counts and peak memory to stderr"
+    )
+    parser.add_argument(
+        "--metrics-json",
+        type=str,
+        metavar="PATH",
+        help="Write the --profile metrics as JSON to PATH"
+    )
 
     args = parser.parse_args()
+    metrics = Metrics() if args.profile or args.metrics_json else NO_METRICS
 
     # Determine project path
     project_path = args.project or os.getcwd()
@@ -262,9 +115,41 @@ def main():
     if args.verbose:
         print(f"[VERBOSE] Project path: {project_path}", file=sys.stderr)
 
+    if args.since and not args.all_sessions:
+        parser.error("--since requires --all-sessions")
+
+    if args.all_sessions:
+        if args.session:
+            parser.error("--session cannot be combined with --all-sessions")
+        if args.format != "json":
+            parser.error("--all-sessions always writes one NDJSON record per session; omit --format")
+        if metrics.enabled:
+            parser.error("--profile and --metrics-json cannot be combined with --all-sessions")
+        since_ms = None
+        if args.since:
+            since_ms = parse_since(args.since)
+            if since_ms is None:
+                print(f"[ERROR] Invalid --since value: {args.since}", file=sys.stderr)
+                print("[HINT] Use YYYY-MM-DD or a relative age like 7d or 12h.", file=sys.stderr)
+                sys.exit(1)
+
+        session_files = find_project_sessions(project_path, since_ms)
+        if not session_files:
+            print("[ERROR] No sessions found for this project.", file=sys.stderr)
+            print(f"[HINT] Expected session files in ~/.claude/projects/{encode_project_path(project_path)}/", file=sys.stderr)
+            sys.exit(1)
+
+        if args.verbose:
+            print(f"[VERBOSE] Parsing {len(session_files)} sessions with {args.workers} workers", file=sys.stderr)
+
+        failed = run_batch(session_files, project_path, args.workers,
+                           checkpoint=args.checkpoint, strict=args.strict, verbose=args.verbose,
+                           snapshots=not args.no_snapshots)
+        sys.exit(1 if failed else 0)
+
     # Determine session ID
     session_id = args.session
-    if session_id and not re.match(r"^[a-f0-9]{8}-[a-f0-9]{4}-[a-f0-9]{4}-[a-f0-9]{4}-[a-f0-9]{12}$", session_id):
+    if session_id and not re.match(SESSION_ID_PATTERN, session_id):
         print(f"[ERROR] Invalid session ID format: {session_id}", file=sys.stderr)
         print("[HINT] Session ID must be a UUID (e.g., abc12345-1234-5678-9abc-def012345678).", file=sys.stderr)
         sys.exit(1)
@@ -298,21 +183,70 @@ def main():
     if args.verbose:
         print(f"[VERBOSE] Session file: {session_file}", file=sys.stderr)
 
+    if args.format == "ndjson":
+        stream_session_ndjson(session_file, project_path, args, metrics)
+        return
+
     # Parse the session
-    result = parse_session(session_file, project_path, verbose=args.verbose)
+    result = parse_session(session_file, project_path, verbose=args.verbose,
+                           checkpoint=args.checkpoint, strict=args.strict,
+                           snapshots=not args.no_snapshots, metrics=metrics)
+    for key in ("user_messages", "file_ops", "snapshots", "snapshot_blobs"):
+        metrics.count(key, len(result[key]))
 
     if not result["file_ops"]:
+        write_metrics(metrics, args.profile, args.metrics_json)
         print("[ERROR] No file operations found in session.", file=sys.stderr)
         print("[HINT] This session may not contain any Edit/Write tool calls.", file=sys.stderr)
         sys.exit(1)
 
     # Output JSON
-    print(json.dumps(result, indent=2, ensure_ascii=False))
+    with metrics.stage("output"):
+        print(json.dumps(result, indent=2, ensure_ascii=False))
+        sys.stdout.flush()
+    write_metrics(metrics, args.profile, args.metrics_json)
 
     if args.verbose:
         print(f"[VERBOSE] Found {len(result['user_messages'])} user messages", file=sys.stderr)
         print(f"[VERBOSE] Found {len(result['file_ops'])} file operations", file=sys.stderr)
-        print(f"[VERBOSE] Found {len(result['snapshots'])} snapshots", file=sys.stderr)
+        print(f"[VERBOSE] Found {len(result['snapshots'])} snapshots "
+              f"({len(result['snapshot_blobs'])} unique file states)", file=sys.stderr)
+
+
+def stream_session_ndjson(session_file: Path, project_path: str, args: argparse.Namespace,
+                          metrics: Metrics = NO_METRICS) -> None:
+    """Parse a session, writing a header and then one NDJSON record per item as parsed."""
+    counts = {record_type: 0 for _, record_type in RECORD_TYPES}
+    write = sys.stdout.write
+
+    def emit(record_type: str, record: dict) -> None:
+        counts[record_type] += 1
+        write(json.dumps({"type": record_type, **record}, ensure_ascii=False) + "\n")
+
+    write(json.dumps({
+        "type": "session",
+        "session_id": session_file.stem,
+        "project_path": project_path,
+    }, ensure_ascii=False) + "\n")
+    parse_session(session_file, project_path, verbose=args.verbose,
+                  checkpoint=args.checkpoint, strict=args.strict, emit=emit,
+                  snapshots=not args.no_snapshots, metrics=metrics)
+    sys.stdout.flush()
+    for record_type, key in (("user_message", "user_messages"), ("file_op", "file_ops"),
+                             ("snapshot", "snapshots"), ("snapshot_blob", "snapshot_blobs")):
+        metrics.count(key, counts[record_type])
+    write_metrics(metrics, args.profile, args.metrics_json)
+
+    if not counts["file_op"]:
+        print("[ERROR] No file operations found in session.", file=sys.stderr)
+        print("[HINT] This session may not contain any Edit/Write tool calls.", file=sys.stderr)
+        sys.exit(1)
+
+    if args.verbose:
+        print(f"[VERBOSE] Found {counts['user_message']} user messages", file=sys.stderr)
+        print(f"[VERBOSE] Found {counts['file_op']} file operations", file=sys.stderr)
+        print(f"[VERBOSE] Found {counts['snapshot']} snapshots "
+              f"({counts['snapshot_blob']} unique file states)", file=sys.stderr)
 
 
 if __name__ == "__main__":
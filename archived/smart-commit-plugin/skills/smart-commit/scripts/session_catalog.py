@@ -0,0 +1,187 @@
+"""
+session_catalog.py - Persistent SQLite catalog of Claude Code session files.
+
+Shared by parse-session.py (smart-commit-plugin) and worktrace.py
+(worktrace-plugin); each plugin ships its own copy, keep them in sync.
+Both use the same database, so a catalog warmed by one is reused by the other.
+
+For each session it records the project path, file size, mtime and first/last
+entry timestamps. refresh_project() only lists a project directory when the
+directory's mtime changed (a session was added or removed), and only re-reads
+session files whose size or mtime changed.
+"""
+
+import re
+import sqlite3
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+from jsonl_reader import iter_lines, iter_lines_reversed, loads_line
+
+CATALOG_FILE = Path.home() / ".claude" / "cache" / "session-catalog.sqlite"
+CATALOG_SCHEMA_VERSION = 1
+
+SESSION_ID_PATTERN = r"^[a-f0-9]{8}-[a-f0-9]{4}-[a-f0-9]{4}-[a-f0-9]{4}-[a-f0-9]{12}$"
+
+# Number of lines read from each end of a session file to find its timestamps
+TIMESTAMP_SCAN_LINES = 6
+
+
+def encode_project_path(path: str) -> str:
+    """Encode project path to Claude's directory name format.
+
+    e.g., /Users/foo/bar → -Users-foo-bar
+    """
+    return re.sub(r"[/.]", "-", path)
+
+
+def to_epoch_ms(ts) -> Optional[int]:
+    """Convert an int or ISO 8601 timestamp to epoch milliseconds."""
+    if isinstance(ts, (int, float)):
+        return int(ts)
+    if isinstance(ts, str):
+        try:
+            dt = datetime.fromisoformat(ts.replace("Z", "+00:00"))
+            return int(dt.timestamp() * 1000)
+        except ValueError:
+            return None
+    return None
+
+
+def first_timestamp(lines) -> Optional[int]:
+    """Return the first entry timestamp among up to TIMESTAMP_SCAN_LINES lines."""
+    for i, line in enumerate(lines):
+        if i >= TIMESTAMP_SCAN_LINES:
+            break
+        try:
+            ts = to_epoch_ms(loads_line(line).get("timestamp"))
+        except (ValueError, AttributeError):
+            continue
+        if ts:
+            return ts
+    return None
+
+
+def read_session_timestamps(session_file: Path) -> tuple[Optional[int], Optional[int]]:
+    """Read (first_ts, last_ts) from the head and tail of a session file."""
+    try:
+        first_ts = first_timestamp(line for _, line in iter_lines(session_file))
+        last_ts = first_timestamp(iter_lines_reversed(session_file))
+    except OSError:
+        return None, None
+    return first_ts, last_ts
+
+
+def open_catalog(catalog_file: Path = CATALOG_FILE) -> Optional[sqlite3.Connection]:
+    """Open (creating if needed) the catalog database, or None if unavailable."""
+    try:
+        catalog_file.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(catalog_file), timeout=5)
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version != CATALOG_SCHEMA_VERSION:
+            conn.executescript("""
+                DROP TABLE IF EXISTS projects;
+                DROP TABLE IF EXISTS sessions;
+                CREATE TABLE projects (
+                    project_path TEXT PRIMARY KEY,
+                    dir_mtime_ns INTEGER NOT NULL
+                );
+                CREATE TABLE sessions (
+                    project_path TEXT NOT NULL,
+                    session_id TEXT NOT NULL,
+                    path TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    mtime_ns INTEGER NOT NULL,
+                    first_ts INTEGER,
+                    last_ts INTEGER,
+                    PRIMARY KEY (project_path, session_id)
+                );
+            """)
+            conn.execute(f"PRAGMA user_version = {CATALOG_SCHEMA_VERSION}")
+            conn.commit()
+        return conn
+    except (OSError, sqlite3.Error):
+        return None
+
+
+def refresh_project(conn: sqlite3.Connection, project_path: str) -> None:
+    """Bring the catalog rows of one project up to date with its session directory."""
+    sessions_dir = Path.home() / ".claude" / "projects" / encode_project_path(project_path)
+    try:
+        dir_mtime_ns = sessions_dir.stat().st_mtime_ns
+    except OSError:
+        with conn:
+            conn.execute("DELETE FROM sessions WHERE project_path = ?", (project_path,))
+            conn.execute("DELETE FROM projects WHERE project_path = ?", (project_path,))
+        return
+
+    known = {
+        row[0]: row[1:]
+        for row in conn.execute(
+            "SELECT session_id, path, size, mtime_ns FROM sessions WHERE project_path = ?",
+            (project_path,),
+        )
+    }
+    row = conn.execute(
+        "SELECT dir_mtime_ns FROM projects WHERE project_path = ?", (project_path,)
+    ).fetchone()
+
+    if row and row[0] == dir_mtime_ns:
+        # No session added or removed: only re-stat the known files
+        candidates = [(session_id, Path(path)) for session_id, (path, _, _) in known.items()]
+    else:
+        candidates = [
+            (f.stem, f) for f in sessions_dir.glob("*.jsonl") if re.match(SESSION_ID_PATTERN, f.stem)
+        ]
+
+    seen = set()
+    updates = []
+    for session_id, session_file in candidates:
+        try:
+            st = session_file.stat()
+        except OSError:
+            continue
+        seen.add(session_id)
+        prev = known.get(session_id)
+        if prev and prev[1] == st.st_size and prev[2] == st.st_mtime_ns:
+            continue
+        first_ts, last_ts = read_session_timestamps(session_file)
+        updates.append((project_path, session_id, str(session_file), st.st_size,
+                        st.st_mtime_ns, first_ts, last_ts))
+
+    with conn:
+        conn.executemany(
+            "INSERT OR REPLACE INTO sessions VALUES (?, ?, ?, ?, ?, ?, ?)", updates
+        )
+        conn.executemany(
+            "DELETE FROM sessions WHERE project_path = ? AND session_id = ?",
+            [(project_path, session_id) for session_id in known if session_id not in seen],
+        )
+        conn.execute(
+            "INSERT OR REPLACE INTO projects VALUES (?, ?)", (project_path, dir_mtime_ns)
+        )
+
+
+def list_sessions(conn: sqlite3.Connection, project_path: str) -> list[tuple[str, Path, int]]:
+    """Return (session_id, path, mtime_ns) for every cataloged session of a project."""
+    rows = conn.execute(
+        "SELECT session_id, path, mtime_ns FROM sessions WHERE project_path = ?",
+        (project_path,),
+    )
+    return [(session_id, Path(path), mtime_ns) for session_id, path, mtime_ns in rows]
+
+
+def sessions_active_between(conn: sqlite3.Connection, project_path: str,
+                            start_epoch_ms: int, end_epoch_ms: int) -> list[str]:
+    """Return IDs of sessions with entries within [start, end].
+
+    A session counts if its first-to-last entry span overlaps the window, so
+    one started the day before and still running on the day is included.
+    """
+    rows = conn.execute(
+        "SELECT session_id FROM sessions WHERE project_path = ? "
+        "AND first_ts <= ? AND COALESCE(last_ts, first_ts) >= ? ORDER BY session_id",
+        (project_path, end_epoch_ms, start_epoch_ms),
+    )
+    return [row[0] for row in rows]
@@ -0,0 +1,745 @@
+"""
+session_parser.py - Parse Claude Code session JSONL into user messages, file ops and snapshots.
+
+Library half of parse-session.py; importable so other stages (see
+smart_commit.py) can use parsed sessions as native objects without a
+JSON round trip through a pipe.
+"""
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import sys
+from pathlib import Path
+from time import perf_counter, process_time
+from typing import Callable, Optional
+
+import session_catalog
+from jsonl_reader import HISTORY_ORDER_SLACK_MS, iter_jsonl, iter_lines, loads_line
+from pipeline_metrics import NO_METRICS, Metrics
+
+SESSION_ID_PATTERN = r"^[a-f0-9]{8}-[a-f0-9]{4}-[a-f0-9]{4}-[a-f0-9]{4}-[a-f0-9]{12}$"
+
+CHECKPOINT_DIR = Path.home() / ".claude" / "cache" / "smart-commit" / "checkpoints"
+CHECKPOINT_VERSION = 2
+
+# State list -> record type for --format ndjson
+RECORD_TYPES = (
+    ("user_messages", "user_message"),
+    ("file_ops", "file_op"),
+    ("snapshot_blobs", "snapshot_blob"),  # Before the snapshots referencing them
+    ("snapshots", "snapshot"),
+)
+
+# Raw byte markers for the prefilter (see classify_line)
+HUMAN_MARKER = b'"human"'
+ASSISTANT_MARKER = b'"assistant"'
+TOOL_USE_MARKER = b'"tool_use"'
+FILE_TOOL_MARKERS = (b'"Edit"', b'"Write"', b'"NotebookEdit"')
+SNAPSHOT_MARKER = b'"file-history-snapshot"'
+TIMESTAMP_MARKER = b'"timestamp"'
+
+# Prefilter line classes
+LINE_SKIP = 0  # Cannot affect the result (except via its timestamp)
+LINE_FULL = 1  # Decode as-is
+LINE_TOOL = 2  # Assistant tool call: decode with payloads stripped
+
+# String-valued keys whose payloads the tool-call path never reads
+PAYLOAD_KEY_RE = re.compile(
+    rb'"(?:content|old_string|new_string|new_source|text|thinking)"\s*:\s*"'
+)
+
+
+def encode_project_path(path: str) -> str:
+    """Encode project path to Claude's directory name format.
+
+    Reused from worktrace-plugin pattern.
+    e.g., /Users/foo/bar → -Users-foo-bar
+    """
+    return re.sub(r"[/.]", "-", path)
+
+
+def find_latest_session(project_path: str, history_file: Path) -> Optional[str]:
+    """Find the most recent session ID for a project from history.jsonl.
+
+    history.jsonl is append-only, so it is scanned backwards from EOF. Entries
+    may be out of order by up to HISTORY_ORDER_SLACK_MS, so the scan only stops
+    once an entry is older than the newest match by more than that. If the
+    scanned entries are more out of order, falls back to a full scan.
+    """
+    norm_project = os.path.normpath(project_path)
+    latest = None
+    latest_ts = None
+    min_ts = None  # Oldest timestamp among entries after the current one in file order
+
+    for entry in iter_jsonl(history_file, reverse=True):
+        ts = entry.get("timestamp")
+        if ts is not None:
+            if not isinstance(ts, (int, float)) or (min_ts is not None and ts > min_ts + HISTORY_ORDER_SLACK_MS):
+                return find_latest_session_full_scan(project_path, history_file)
+            min_ts = ts if min_ts is None else min(min_ts, ts)
+            if latest is not None and ts < latest_ts - HISTORY_ORDER_SLACK_MS:
+                break
+        else:
+            ts = 0  # As in the full scan
+
+        entry_project = entry.get("project", "")
+        if entry_project and os.path.normpath(entry_project) == norm_project:
+            # On equal timestamps the earliest entry in file order wins,
+            # matching the stable sort of the full scan
+            if latest is None or ts >= latest_ts:
+                latest = entry
+                latest_ts = ts
+
+    if latest is None:
+        return None
+    return latest.get("sessionId") or latest.get("session_id")
+
+
+def find_latest_session_full_scan(project_path: str, history_file: Path) -> Optional[str]:
+    """Find the most recent session ID for a project by scanning all of history.jsonl."""
+    entries = iter_jsonl(history_file)
+    # history.jsonl entries have project paths and session references
+    # Filter entries matching our project
+    matching = []
+    for entry in entries:
+        entry_project = entry.get("project", "")
+        if entry_project and os.path.normpath(entry_project) == os.path.normpath(project_path):
+            matching.append(entry)
+
+    if not matching:
+        return None
+
+    # Sort by timestamp descending, return latest session_id
+    matching.sort(key=lambda e: e.get("timestamp", 0), reverse=True)
+    return matching[0].get("sessionId") or matching[0].get("session_id")
+
+
+def catalog_sessions(project_path: str) -> Optional[list[tuple[str, Path, int]]]:
+    """List a project's sessions from the shared session catalog.
+
+    Returns (session_id, path, mtime_ns) tuples, or None if the catalog is
+    unavailable and the caller should walk the projects directory instead.
+    """
+    conn = session_catalog.open_catalog()
+    if not conn:
+        return None
+    try:
+        session_catalog.refresh_project(conn, project_path)
+        return session_catalog.list_sessions(conn, project_path)
+    except sqlite3.Error:
+        return None
+    finally:
+        conn.close()
+
+
+def find_session_from_projects_dir(project_path: str) -> Optional[str]:
+    """Find latest session by checking the projects directory directly."""
+    cataloged = catalog_sessions(project_path)
+    if cataloged is not None:
+        if not cataloged:
+            return None
+        return max(cataloged, key=lambda s: s[2])[0]
+
+    encoded = encode_project_path(project_path)
+    sessions_dir = Path.home() / ".claude" / "projects" / encoded
+
+    if not sessions_dir.exists():
+        return None
+
+    # Find most recently modified session JSONL
+    session_files = []
+    for f in sessions_dir.glob("*.jsonl"):
+        # Only UUID-named session files
+        if re.match(SESSION_ID_PATTERN, f.stem):
+            session_files.append(f)
+
+    if not session_files:
+        return None
+
+    # Sort by modification time, latest first
+    session_files.sort(key=lambda f: f.stat().st_mtime, reverse=True)
+    return session_files[0].stem
+
+
+def find_project_sessions(project_path: str, since_ms: Optional[int] = None) -> list[Path]:
+    """Find all session files of a project, optionally only those modified since since_ms.
+
+    Sorted by modification time (oldest first), then session ID, so batch
+    output order does not depend on worker scheduling.
+    """
+    cataloged = catalog_sessions(project_path)
+    if cataloged is None:
+        encoded = encode_project_path(project_path)
+        sessions_dir = Path.home() / ".claude" / "projects" / encoded
+        if not sessions_dir.exists():
+            return []
+        cataloged = []
+        for f in sessions_dir.glob("*.jsonl"):
+            if not re.match(SESSION_ID_PATTERN, f.stem):
+                continue
+            try:
+                cataloged.append((f.stem, f, f.stat().st_mtime_ns))
+            except OSError:
+                continue
+
+    sessions = []
+    for session_id, session_file, mtime_ns in cataloged:
+        mtime_ms = mtime_ns // 1_000_000
+        if since_ms is None or mtime_ms >= since_ms:
+            sessions.append((mtime_ms, session_id, session_file))
+
+    sessions.sort(key=lambda s: (s[0], s[1]))
+    return [f for _, _, f in sessions]
+
+
+def parse_since(value: str) -> Optional[int]:
+    """Parse --since as YYYY-MM-DD (local midnight) or a relative age like 7d / 12h.
+
+    Returns epoch milliseconds, or None if the value is not recognized.
+    """
+    from datetime import datetime
+
+    match = re.match(r"^(\d+)([dh])$", value)
+    if match:
+        amount, unit = int(match.group(1)), match.group(2)
+        seconds = amount * (86400 if unit == "d" else 3600)
+        return int((datetime.now().timestamp() - seconds) * 1000)
+    try:
+        return int(datetime.strptime(value, "%Y-%m-%d").timestamp() * 1000)
+    except ValueError:
+        return None
+
+
+def parse_timestamp(ts) -> Optional[int]:
+    """Parse timestamp to epoch milliseconds. Handles both int and ISO string."""
+    if isinstance(ts, (int, float)):
+        return int(ts)
+    if isinstance(ts, str):
+        try:
+            from datetime import datetime
+            dt = datetime.fromisoformat(ts.replace("Z", "+00:00"))
+            return int(dt.timestamp() * 1000)
+        except (ValueError, TypeError):
+            return None
+    return None
+
+
+def extract_tool_calls(message: dict) -> list[dict]:
+    """Extract tool use blocks from an assistant message."""
+    tools = []
+    content = message.get("content", [])
+    if isinstance(content, str):
+        return tools
+    for block in content:
+        if isinstance(block, dict) and block.get("type") == "tool_use":
+            tools.append(block)
+    return tools
+
+
+def extract_file_ops_from_tool(tool: dict, project_path: str) -> Optional[dict]:
+    """Extract file operation info from a tool_use block."""
+    name = tool.get("name", "")
+    inp = tool.get("input", {})
+
+    if name not in ("Edit", "Write", "NotebookEdit"):
+        return None
+
+    file_path = inp.get("file_path", "")
+    if not file_path:
+        return None
+
+    # Filter out files outside the project
+    norm_project = os.path.normpath(project_path)
+    norm_file = os.path.normpath(file_path)
+    if not norm_file.startswith(norm_project):
+        return None
+
+    # Determine change type
+    if name == "Write":
+        change = "write"
+    elif name == "Edit":
+        change = "edit"
+    elif name == "NotebookEdit":
+        change = "notebook_edit"
+    else:
+        change = "unknown"
+
+    # Make path relative to project
+    rel_path = os.path.relpath(norm_file, norm_project)
+
+    return {
+        "path": rel_path,
+        "absolute_path": file_path,
+        "tool": name,
+        "change": change,
+    }
+
+
+def extract_user_text(message: dict) -> Optional[str]:
+    """Extract text content from a user message."""
+    content = message.get("content", "")
+    if isinstance(content, str):
+        return content.strip() if content.strip() else None
+    if isinstance(content, list):
+        texts = []
+        for block in content:
+            if isinstance(block, dict) and block.get("type") == "text":
+                texts.append(block.get("text", ""))
+            elif isinstance(block, str):
+                texts.append(block)
+        combined = " ".join(texts).strip()
+        return combined if combined else None
+    return None
+
+
+def classify_line(line: bytes, snapshots: bool = True) -> int:
+    """Classify raw line bytes by markers of entries parse_session() uses.
+
+    Quotes inside JSON string values are always escaped, so a quoted marker
+    only matches a real key or value. False positives are harmless (the line
+    is decoded and examined as usual); there are no false negatives for
+    well-formed entries. Snapshot lines are skipped when snapshots is False.
+    """
+    if HUMAN_MARKER in line or (snapshots and SNAPSHOT_MARKER in line):
+        return LINE_FULL
+    if TOOL_USE_MARKER in line and ASSISTANT_MARKER in line:
+        if any(marker in line for marker in FILE_TOOL_MARKERS):
+            return LINE_TOOL
+    return LINE_SKIP
+
+
+def strip_tool_payloads(line: bytes) -> bytes:
+    """Blank out large string values the tool-call path never reads.
+
+    Write contents, Edit old/new strings, notebook sources and assistant
+    text/thinking are replaced by empty strings before decoding, so
+    json.loads() never builds Python strings for them. Only name and
+    input.file_path are needed by extract_file_ops_from_tool().
+    """
+    # Mask escaped backslashes and quotes with same-length filler: every quote
+    # left in the masked copy is a real string delimiter, so offsets found in
+    # it apply to the original line.
+    masked = line.replace(b"\\\\", b"__").replace(b'\\"', b"__")
+    pieces = []
+    pos = 0
+    for key in PAYLOAD_KEY_RE.finditer(masked):
+        end = masked.find(b'"', key.end())
+        if end < 0:
+            break  # Unterminated string: leave it for json.loads to reject
+        pieces.append(line[pos:key.end()])
+        pos = end  # Keep the closing quote
+    if not pieces:
+        return line
+    pieces.append(line[pos:])
+    return b"".join(pieces)
+
+
+def is_complete_object(line: bytes) -> bool:
+    """Cheap structural check that a line holds one {...} JSON object."""
+    if line.startswith(b"{") and (line.endswith(b"}\n") or line.endswith(b"}")):
+        return True
+    stripped = line.strip()
+    return stripped.startswith(b"{") and stripped.endswith(b"}")
+
+
+def new_parse_state() -> dict:
+    """Create an empty parser state."""
+    return {
+        "user_messages": [],
+        "file_ops": [],
+        "snapshots": [],
+        "snapshot_blobs": [],
+        "snapshot_hashes": set(),
+        "current_timestamp": None,
+        "user_msg_index": 0,
+    }
+
+
+def snapshot_blob_ref(state: dict, file_state) -> str:
+    """Store a snapshot file state by content hash, once, and return its hash."""
+    canonical = json.dumps(file_state, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    digest = hashlib.blake2b(canonical.encode("utf-8"), digest_size=8).hexdigest()
+    if digest not in state["snapshot_hashes"]:
+        state["snapshot_hashes"].add(digest)
+        state["snapshot_blobs"].append({"hash": digest, "state": file_state})
+    return digest
+
+
+def process_entry(entry: dict, state: dict, project_path: str, verbose: bool = False,
+                  snapshots: bool = True) -> None:
+    """Apply a single session entry to the parser state."""
+    entry_type = entry.get("type")
+    ts = parse_timestamp(entry.get("timestamp"))
+
+    if ts:
+        state["current_timestamp"] = ts
+    current_timestamp = state["current_timestamp"]
+
+    # User messages
+    if entry_type == "human" or entry.get("role") == "human":
+        text = extract_user_text(entry)
+        if text:
+            # Skip system-generated messages
+            if text.startswith("<system-reminder>") or text.startswith("{\"type\":"):
+                return
+            state["user_messages"].append({
+                "index": state["user_msg_index"],
+                "timestamp": current_timestamp,
+                "text": text[:500],  # Truncate long messages
+            })
+            state["user_msg_index"] += 1
+            if verbose:
+                preview = text[:80].replace("\n", " ")
+                print(f"[VERBOSE] User message {state['user_msg_index']}: {preview}", file=sys.stderr)
+
+    # Assistant messages with tool calls
+    elif entry_type == "assistant" or entry.get("role") == "assistant":
+        tools = extract_tool_calls(entry)
+        for tool in tools:
+            op = extract_file_ops_from_tool(tool, project_path)
+            if op:
+                op["timestamp"] = current_timestamp
+                op["user_msg_index"] = max(0, state["user_msg_index"] - 1)
+                state["file_ops"].append(op)
+                if verbose:
+                    print(f"[VERBOSE] File op: {op['change']} {op['path']}", file=sys.stderr)
+
+    # File history snapshots: each unique file state is stored once in
+    # snapshot_blobs, and snapshots only keep path -> hash references
+    elif entry_type == "file-history-snapshot" and snapshots:
+        snapshot_data = entry.get("data", {})
+        if snapshot_data:
+            if isinstance(snapshot_data, dict):
+                files = {path: snapshot_blob_ref(state, file_state)
+                         for path, file_state in snapshot_data.items()}
+            else:
+                files = snapshot_blob_ref(state, snapshot_data)
+            state["snapshots"].append({
+                "timestamp": current_timestamp,
+                "files": files,
+            })
+
+
+def checkpoint_path(session_file: Path) -> Path:
+    """Return the sidecar checkpoint path for a session file."""
+    return CHECKPOINT_DIR / f"{session_file.stem}.json"
+
+
+def load_checkpoint(session_file: Path, project_path: str, snapshots: bool = True) -> Optional[dict]:
+    """Load a checkpoint that is still valid for the session file.
+
+    A checkpoint is discarded (forcing a full parse) when it was written for a
+    different file, project or snapshot setting, when the file was replaced
+    (inode changed), or when the file shrank below the recorded offset.
+    """
+    cp_file = checkpoint_path(session_file)
+    if not cp_file.exists():
+        return None
+    try:
+        with open(cp_file, "r", encoding="utf-8") as f:
+            checkpoint = json.load(f)
+        st = session_file.stat()
+    except (OSError, json.JSONDecodeError):
+        return None
+
+    if not isinstance(checkpoint, dict) or checkpoint.get("version") != CHECKPOINT_VERSION:
+        return None
+    if checkpoint.get("session_file") != str(session_file):
+        return None
+    if checkpoint.get("project_path") != project_path or checkpoint.get("snapshots") != snapshots:
+        return None
+    if checkpoint.get("inode") != st.st_ino or st.st_size < checkpoint.get("offset", 0):
+        return None
+    checkpoint["state"]["snapshot_hashes"] = set(checkpoint["state"]["snapshot_hashes"])
+    return checkpoint
+
+
+def save_checkpoint(session_file: Path, project_path: str, offset: int, state: dict,
+                    snapshots: bool = True) -> None:
+    """Persist the byte offset and parser state, replacing the file atomically."""
+    cp_file = checkpoint_path(session_file)
+    try:
+        cp_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = cp_file.with_suffix(".tmp")
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump({
+                "version": CHECKPOINT_VERSION,
+                "session_file": str(session_file),
+                "project_path": project_path,
+                "snapshots": snapshots,
+                "inode": session_file.stat().st_ino,
+                "offset": offset,
+                "state": dict(state, snapshot_hashes=sorted(state["snapshot_hashes"])),
+            }, f, ensure_ascii=False)
+        os.replace(tmp_file, cp_file)
+    except OSError as e:
+        print(f"[WARN] Failed to write checkpoint {cp_file}: {e}", file=sys.stderr)
+
+
+def emit_new_records(state: dict, emitted: dict, emit: Callable[[str, dict], None], keep: bool) -> None:
+    """Pass records added to the state since the last call to emit.
+
+    Unless keep is set, emitted records are dropped from the state so memory
+    stays bounded while streaming.
+    """
+    for key, record_type in RECORD_TYPES:
+        items = state[key]
+        for item in items[emitted[key]:]:
+            emit(record_type, item)
+        if keep:
+            emitted[key] = len(items)
+        else:
+            items.clear()
+
+
+def parse_lines(session_file: Path, project_path: str, state: dict, offset: int = 0,
+                verbose: bool = False, strict: bool = False, snapshots: bool = True,
+                on_entry: Optional[Callable[[], None]] = None,
+                on_tail: Optional[Callable[[int], bool]] = None,
+                metrics: Metrics = NO_METRICS) -> int:
+    """Parse session lines from byte offset into state; return the offset reached.
+
+    Unless strict=True, lines that cannot yield a user message, file op or
+    snapshot are skipped by classify_line() without being decoded, and tool
+    call lines are decoded without their large payloads. on_entry() is called
+    after each processed entry.
+
+    When the last line has no newline (likely still being written), on_tail
+    is called with its start offset once state is up to date; if it returns
+    True, parsing stops there and that offset is returned, so a later call
+    decodes the line again once complete.
+
+    Line counts go to metrics. Prefiltered lines are never decoded, so among
+    them only blank lines and lines that are not a complete {...} object
+    (e.g. truncated writes) count as blank and malformed; lines_malformed is
+    exact only with strict=True. With metrics enabled, decoding, extraction
+    and on_entry() are also timed per line as the decode, extract and emit
+    stages, and the rest of the loop as load.
+    """
+    # Byte ranges of prefiltered lines carrying a timestamp since the last
+    # decoded entry. They are only decoded when the next decoded entry has no
+    # timestamp of its own and needs the carried-over one.
+    pending_ts = []
+
+    def resolve_pending_timestamp():
+        if not pending_ts:
+            return
+        with open(session_file, "rb") as rf:
+            for start, end in reversed(pending_ts):
+                rf.seek(start)
+                try:
+                    ts = parse_timestamp(loads_line(rf.read(end - start)).get("timestamp"))
+                except (ValueError, AttributeError):
+                    continue
+                if ts:
+                    state["current_timestamp"] = ts
+                    break
+        pending_ts.clear()
+
+    timed = metrics.enabled
+    first_offset = offset
+    lines = decoded = malformed = blank = 0
+    # [wall, cpu] seconds of the decode, extract and emit stages
+    decode_time, extract_time, emit_time = [0.0, 0.0], [0.0, 0.0], [0.0, 0.0]
+    loop_started = (perf_counter(), process_time())
+
+    try:
+        for lines, (start, line) in enumerate(iter_lines(session_file, offset), 1):
+            if on_tail and not line.endswith(b"\n"):
+                resolve_pending_timestamp()
+                if on_tail(start):
+                    lines -= 1
+                    return start
+            offset = start + len(line)
+            if not strict:
+                line_class = classify_line(line, snapshots)
+                if line_class == LINE_SKIP:
+                    if TIMESTAMP_MARKER in line:
+                        pending_ts.append((start, offset))
+                    elif timed and line.isspace():
+                        blank += 1
+                        continue
+                    if timed and not is_complete_object(line):
+                        malformed += 1
+                    continue
+                if line_class == LINE_TOOL:
+                    line = strip_tool_payloads(line)
+            if line.isspace():
+                blank += 1
+                continue
+            if timed:
+                wall, cpu = perf_counter(), process_time()
+            try:
+                entry = loads_line(line)
+            except ValueError:
+                malformed += 1
+                continue
+            decoded += 1
+            if timed:
+                wall2, cpu2 = perf_counter(), process_time()
+                decode_time[0] += wall2 - wall
+                decode_time[1] += cpu2 - cpu
+            if pending_ts:
+                if parse_timestamp(entry.get("timestamp")):
+                    pending_ts.clear()
+                else:
+                    resolve_pending_timestamp()
+            process_entry(entry, state, project_path, verbose=verbose, snapshots=snapshots)
+            if timed:
+                wall, cpu = perf_counter(), process_time()
+                extract_time[0] += wall - wall2
+                extract_time[1] += cpu - cpu2
+            if on_entry:
+                on_entry()
+                if timed:
+                    emit_time[0] += perf_counter() - wall
+                    emit_time[1] += process_time() - cpu
+
+        resolve_pending_timestamp()
+        return offset
+    finally:
+        metrics.count("bytes_read", offset - first_offset)
+        metrics.count("lines_read", lines)
+        metrics.count("lines_decoded", decoded)
+        metrics.count("lines_prefiltered", lines - decoded - malformed - blank)
+        metrics.count("lines_malformed", malformed)
+        metrics.count("lines_blank", blank)
+        if timed:
+            wall = perf_counter() - loop_started[0] - decode_time[0] - extract_time[0] - emit_time[0]
+            cpu = process_time() - loop_started[1] - decode_time[1] - extract_time[1] - emit_time[1]
+            metrics.add_time("load", wall, cpu)
+            metrics.add_time("decode", *decode_time, calls=decoded)
+            metrics.add_time("extract", *extract_time, calls=decoded)
+            if on_entry:
+                metrics.add_time("emit", *emit_time, calls=decoded)
+
+
+def parse_session(session_file: Path, project_path: str, verbose: bool = False,
+                  checkpoint: bool = False, strict: bool = False,
+                  emit: Optional[Callable[[str, dict], None]] = None,
+                  snapshots: bool = True, metrics: Metrics = NO_METRICS) -> dict:
+    """Parse a session JSONL file and extract structured data.
+
+    With checkpoint=True, parsing resumes from the byte offset and state saved
+    by the previous run, so only lines appended since then are decoded.
+    Unless strict=True, irrelevant lines are prefiltered (see parse_lines()).
+
+    If emit is given, each user message, file op, snapshot and snapshot blob
+    is passed to emit(record_type, record) as soon as it is parsed instead of
+    being collected, so the returned collections are empty (except with
+    checkpoint=True, which needs the full state).
+
+    Snapshots reference file states by content hash; the states themselves are
+    returned once each in snapshot_blobs. With snapshots=False, snapshot
+    entries are not decoded at all.
+
+    Stage times and line counts are recorded in metrics (see parse_lines()).
+    """
+    state = new_parse_state()
+    offset = 0
+
+    if checkpoint:
+        with metrics.stage("checkpoint"):
+            saved = load_checkpoint(session_file, project_path, snapshots)
+        if saved:
+            state = saved["state"]
+            offset = saved["offset"]
+            if verbose:
+                print(f"[VERBOSE] Resuming from checkpoint at byte {offset}", file=sys.stderr)
+        elif verbose:
+            print("[VERBOSE] No valid checkpoint, parsing full session", file=sys.stderr)
+
+    emitted = {key: 0 for key, _ in RECORD_TYPES}
+    if emit:
+        # Records restored from a checkpoint come first
+        emit_new_records(state, emitted, emit, keep=checkpoint)
+
+    def emit_entry_records():
+        emit_new_records(state, emitted, emit, keep=checkpoint)
+
+    tail_checkpointed = False
+
+    def checkpoint_tail(start: int) -> bool:
+        # Checkpoint before the unterminated tail so the next run decodes it
+        # again once complete, but still parse it for this run
+        nonlocal tail_checkpointed
+        save_checkpoint(session_file, project_path, start, state, snapshots)
+        tail_checkpointed = True
+        return False
+
+    offset = parse_lines(session_file, project_path, state, offset, verbose=verbose, strict=strict,
+                         snapshots=snapshots,
+                         on_entry=emit_entry_records if emit else None,
+                         on_tail=checkpoint_tail if checkpoint else None, metrics=metrics)
+
+    if emit:
+        emit_new_records(state, emitted, emit, keep=checkpoint)
+
+    if checkpoint and not tail_checkpointed:
+        with metrics.stage("checkpoint"):
+            save_checkpoint(session_file, project_path, offset, state, snapshots)
+
+    return {
+        "session_id": session_file.stem,
+        "project_path": project_path,
+        "user_messages": state["user_messages"],
+        "file_ops": state["file_ops"],
+        "snapshots": state["snapshots"],
+        "snapshot_blobs": {blob["hash"]: blob["state"] for blob in state["snapshot_blobs"]},
+    }
+
+
+def parse_session_record(task: tuple) -> dict:
+    """Parse one session for batch mode; runs in a worker process.
+
+    Failures are reported in the record instead of raised, so one broken
+    session does not abort the batch.
+    """
+    session_file, project_path, checkpoint, strict, snapshots = task
+    try:
+        return parse_session(session_file, project_path, checkpoint=checkpoint, strict=strict,
+                             snapshots=snapshots)
+    except Exception as e:  # noqa: BLE001 - isolate per-session failures
+        return {
+            "session_id": session_file.stem,
+            "project_path": project_path,
+            "error": f"{type(e).__name__}: {e}",
+        }
+
+
+def run_batch(session_files: list[Path], project_path: str, workers: int,
+              checkpoint: bool = False, strict: bool = False, verbose: bool = False,
+              snapshots: bool = True) -> int:
+    """Parse many sessions across a process pool, streaming one NDJSON record per session.
+
+    Records are written in the order of session_files regardless of which
+    worker finishes first. Returns the number of sessions that failed.
+    """
+    tasks = [(f, project_path, checkpoint, strict, snapshots) for f in session_files]
+    failed = 0
+
+    if workers <= 1 or len(tasks) <= 1:
+        results = map(parse_session_record, tasks)
+        executor = None
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+        executor = ProcessPoolExecutor(max_workers=workers)
+        results = executor.map(parse_session_record, tasks)
+
+    try:
+        for record in results:
+            if "error" in record:
+                failed += 1
+                print(f"[ERROR] Failed to parse session {record['session_id']}: {record['error']}", file=sys.stderr)
+            elif verbose:
+                print(f"[VERBOSE] Session {record['session_id']}: {len(record['file_ops'])} file ops", file=sys.stderr)
+            sys.stdout.write(json.dumps(record, ensure_ascii=False) + "\n")
+            sys.stdout.flush()
+    finally:
+        if executor:
+            executor.shutdown()
+
+    return failed
@@ -0,0 +1,97 @@
+"""
+smart_commit.py - In-process API for the smart-commit pipeline.
+
+Runs session parsing and commit grouping in one process, passing parsed
+messages and file ops as native objects instead of serializing them between
+parse-session.py and analyze-commits.py.
+
+    from smart_commit import analyze_session
+    result = analyze_session(session_file, "/path/to/project")
+
+watch_session() follows a session that is still being written and yields
+commit group changes as they happen.
+"""
+
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Iterator, Union
+
+from commit_analyzer import IncrementalAnalysis, analyze_session_data, git_changed_paths
+from pipeline_metrics import NO_METRICS, Metrics
+from session_parser import new_parse_state, parse_lines, parse_session
+
+
+def analyze_session(path: Union[str, Path], project: str, verbose: bool = False,
+                    checkpoint: bool = False, strict: bool = False, git_check: bool = False,
+                    metrics: Metrics = NO_METRICS) -> dict:
+    """Parse a session JSONL file and group its file ops into commits.
+
+    With git_check=True, files that no longer differ from git's index and
+    HEAD are dropped (see commit_analyzer.git_changed_paths()). Parse and
+    analysis stages are both recorded in metrics.
+    Returns the same document analyze-commits.py prints, plus session_id.
+    Raises ValueError if the session has no file operations.
+    """
+    project = os.path.normpath(os.path.expanduser(project))
+    session = parse_session(Path(path), project, verbose=verbose,
+                            checkpoint=checkpoint, strict=strict, snapshots=False, metrics=metrics)
+    if not session["file_ops"]:
+        raise ValueError(f"No file operations found in session {session['session_id']}")
+
+    changed_paths = None
+    if git_check:
+        with metrics.stage("git_check"):
+            changed_paths = git_changed_paths(project)
+    result = analyze_session_data(session["file_ops"], session["user_messages"], verbose=verbose,
+                                  changed_paths=changed_paths, metrics=metrics)
+    result["session_id"] = session["session_id"]
+    return result
+
+
+def watch_session(path: Union[str, Path], project: str, interval: float = 2.0,
+                  strict: bool = False, verbose: bool = False) -> Iterator[dict]:
+    """Tail a session JSONL file and yield commit group changes as it grows.
+
+    Every interval seconds, only the complete lines appended since the last
+    poll are parsed and fed to IncrementalAnalysis; the group and removed
+    records it returns are yielded. If the file is replaced or truncated,
+    the session is followed again from the start. Runs until interrupted.
+    Raises FileNotFoundError if the session file does not exist.
+    """
+    session_file = Path(path)
+    project = os.path.normpath(os.path.expanduser(project))
+    inode = session_file.stat().st_ino
+    state = new_parse_state()
+    offset = 0
+    analysis = IncrementalAnalysis()
+
+    while True:
+        try:
+            st = session_file.stat()
+        except FileNotFoundError:
+            st = None
+        if st and (st.st_ino != inode or st.st_size < offset):
+            if verbose:
+                print("[VERBOSE] Session file replaced or truncated, restarting", file=sys.stderr)
+            for group_id in sorted(analysis.emitted):
+                yield {"type": "removed", "group_id": group_id}
+            inode = st.st_ino
+            state = new_parse_state()
+            offset = 0
+            analysis = IncrementalAnalysis()
+
+        if st and st.st_size > offset:
+            # Stop before a partially written last line; it is re-read next poll
+            offset = parse_lines(session_file, project, state, offset, verbose=verbose,
+                                 strict=strict, snapshots=False, on_tail=lambda start: True)
+            user_messages, file_ops = state["user_messages"], state["file_ops"]
+            state["user_messages"], state["file_ops"] = [], []
+            if user_messages or file_ops:
+                if verbose:
+                    print(f"[VERBOSE] +{len(user_messages)} user messages, +{len(file_ops)} file ops "
+                          f"(offset {offset})", file=sys.stderr)
+                yield from analysis.add(user_messages, file_ops)
+
+        time.sleep(interval)
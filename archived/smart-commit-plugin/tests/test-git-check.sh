@@ -0,0 +1,119 @@
+#!/bin/bash
+set -euo pipefail
+
+SCRIPT_DIR=$(cd "$(dirname "$0")" && pwd)
+SCRIPTS_DIR="$SCRIPT_DIR/../skills/smart-commit/scripts"
+TMPDIR_BASE=$(cd "$(mktemp -d)" && pwd -P)
+ERRORS=0
+
+cleanup() {
+  rm -rf "$TMPDIR_BASE"
+}
+trap cleanup EXIT
+
+# Keep git from finding a repository above the temporary directory
+export GIT_CEILING_DIRECTORIES="$TMPDIR_BASE"
+
+assert_eq() {
+  local label="$1" expected="$2" actual="$3"
+  if [ "$expected" != "$actual" ]; then
+    echo "  FAIL: $label - expected '$expected', got '$actual'"
+    ERRORS=$((ERRORS + 1))
+  else
+    echo "  OK: $label"
+  fi
+}
+
+# Prints the sorted paths git_changed_paths() reports for a directory, or None
+changed_paths() {
+  python3 - "$SCRIPTS_DIR" "$1" <<'PY'
+import sys
+sys.path.insert(0, sys.argv[1])
+from commit_analyzer import git_changed_paths
+changed = git_changed_paths(sys.argv[2])
+print(None if changed is None else " ".join(sorted(changed)))
+PY
+}
+
+git_repo() {
+  git -C "$REPO" -c user.name=test -c user.email=test@example.com "$@"
+}
+
+REPO="$TMPDIR_BASE/repo"
+mkdir -p "$REPO/src" "$REPO/sub/pkg"
+git -C "$REPO" init -b main --quiet
+echo "a" > "$REPO/src/modified.py"
+echo "b" > "$REPO/src/clean.py"
+echo "c" > "$REPO/src/renamed_old.py"
+echo "d" > "$REPO/src/moved_old.py"
+echo "e" > "$REPO/sub/pkg/inside.py"
+echo "f" > "$REPO/sub/pkg/clean inside.py"
+echo "g" > "$REPO/src/reverted.py"
+git_repo add -A
+git_repo commit -m "init" --quiet
+
+echo "a2" > "$REPO/src/modified.py"
+echo "new" > "$REPO/src/untracked file.py"
+git_repo mv src/renamed_old.py src/renamed_new.py
+mv "$REPO/src/moved_old.py" "$REPO/src/moved_new.py"
+echo "e2" > "$REPO/sub/pkg/inside.py"
+echo "g2" > "$REPO/src/reverted.py"
+echo "g" > "$REPO/src/reverted.py"
+
+# ── Test 1: Modified, untracked and clean files ──
+echo "Test 1: Changed paths from the repository root"
+assert_eq "modified, untracked, both sides of renames; not clean or reverted" \
+  "src/modified.py src/moved_new.py src/moved_old.py src/renamed_new.py src/renamed_old.py src/untracked file.py sub/pkg/inside.py" \
+  "$(changed_paths "$REPO")"
+
+# ── Test 2: Project in a subdirectory ──
+echo "Test 2: Changed paths relative to a project subdirectory"
+assert_eq "only the subdirectory's changes, relative to it" "pkg/inside.py" "$(changed_paths "$REPO/sub")"
+
+# ── Test 3: Not a repository ──
+echo "Test 3: Directory outside any git work tree"
+mkdir -p "$TMPDIR_BASE/plain"
+assert_eq "returns None" "None" "$(changed_paths "$TMPDIR_BASE/plain" 2>/dev/null)"
+
+# ── Test 4: Dropping unchanged files and empty groups ──
+echo "Test 4: drop_unchanged_files() against the repository's status"
+RESULT=$(python3 - "$SCRIPTS_DIR" "$REPO" <<'PY'
+import sys
+sys.path.insert(0, sys.argv[1])
+from commit_analyzer import FileOp, drop_unchanged_files, git_changed_paths
+groups = [
+    [FileOp("src/modified.py"), FileOp("src/clean.py")],
+    [FileOp("src/reverted.py"), FileOp("src/clean.py")],
+    [FileOp("src/renamed_new.py"), FileOp("src/untracked file.py")],
+]
+kept, dropped = drop_unchanged_files(groups, git_changed_paths(sys.argv[2]))
+print("|".join(",".join(op.path for op in group) for group in kept), "/", ",".join(dropped))
+PY
+)
+assert_eq "clean and reverted files dropped, empty group removed" \
+  "src/modified.py|src/renamed_new.py,src/untracked file.py / src/clean.py,src/reverted.py" "$RESULT"
+
+# ── Test 5: analyze-commits.py --git-check ──
+echo "Test 5: --git-check end to end"
+cat > "$TMPDIR_BASE/session.json" <<'JSON'
+{"user_messages": [{"index": 0, "timestamp": 1000, "text": "update the modules"}],
+ "file_ops": [
+   {"path": "src/modified.py", "change": "edit", "timestamp": 1000, "user_msg_index": 0},
+   {"path": "src/reverted.py", "change": "edit", "timestamp": 1001, "user_msg_index": 0},
+   {"path": "src/clean.py", "change": "edit", "timestamp": 1002, "user_msg_index": 0}
+ ]}
+JSON
+FILES=$(python3 "$SCRIPTS_DIR/analyze-commits.py" --session-data "$TMPDIR_BASE/session.json" \
+  --project "$REPO" --git-check \
+  | python3 -c '
+import json, sys
+result = json.load(sys.stdin)
+print(",".join(f["path"] for g in result["commit_groups"] for f in g["files"]))
+')
+assert_eq "only the modified file is proposed" "src/modified.py" "$FILES"
+
+if [ "$ERRORS" -gt 0 ]; then
+  echo "test-git-check: $ERRORS error(s)"
+  exit 1
+fi
+echo "test-git-check: all passed"
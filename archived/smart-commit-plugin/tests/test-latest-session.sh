@@ -0,0 +1,96 @@
+#!/bin/bash
+set -euo pipefail
+
+SCRIPT_DIR=$(cd "$(dirname "$0")" && pwd)
+SCRIPTS_DIR="$SCRIPT_DIR/../skills/smart-commit/scripts"
+TMPDIR_BASE=$(mktemp -d)
+ERRORS=0
+
+cleanup() {
+  rm -rf "$TMPDIR_BASE"
+}
+trap cleanup EXIT
+
+assert_eq() {
+  local label="$1" expected="$2" actual="$3"
+  if [ "$expected" != "$actual" ]; then
+    echo "  FAIL: $label - expected '$expected', got '$actual'"
+    ERRORS=$((ERRORS + 1))
+  else
+    echo "  OK: $label"
+  fi
+}
+
+# Prints "<reverse scan result> <full scan result>" for a history file and project
+latest() {
+  python3 - "$SCRIPTS_DIR" "$1" "$2" <<'PY'
+import sys
+from pathlib import Path
+sys.path.insert(0, sys.argv[1])
+from session_parser import find_latest_session, find_latest_session_full_scan
+history, project = Path(sys.argv[2]), sys.argv[3]
+print(find_latest_session(project, history), find_latest_session_full_scan(project, history))
+PY
+}
+
+HISTORY="$TMPDIR_BASE/history.jsonl"
+MIN=60000
+
+# ── Test 1: Small disorder from concurrent sessions ──
+echo "Test 1: Newest entry followed by older entries within the slack"
+cat > "$HISTORY" <<JSON
+{"display": "a", "timestamp": $((1000 * MIN)), "project": "/p", "sessionId": "old"}
+{"display": "b", "timestamp": $((1030 * MIN)), "project": "/p", "sessionId": "newest"}
+{"display": "c", "timestamp": $((1020 * MIN)), "project": "/q", "sessionId": "other"}
+{"display": "d", "timestamp": $((1025 * MIN)), "project": "/p", "sessionId": "late-write"}
+JSON
+assert_eq "reverse scan matches full scan" "newest newest" "$(latest "$HISTORY" /p)"
+
+# ── Test 2: Tied timestamps around a timestamp-less line ──
+echo "Test 2: Tie-break with a timestamp-less line between tied entries"
+cat > "$HISTORY" <<JSON
+{"display": "a", "timestamp": $((1000 * MIN)), "project": "/p", "sessionId": "first-tied"}
+{"display": "b", "project": "/p", "sessionId": "no-timestamp"}
+{"display": "c", "timestamp": $((1000 * MIN)), "project": "/p", "sessionId": "second-tied"}
+JSON
+assert_eq "reverse scan matches full scan" "first-tied first-tied" "$(latest "$HISTORY" /p)"
+
+# ── Test 3: Randomized histories within the slack ──
+echo "Test 3: Randomized histories with disorder within the slack"
+MISMATCHES=$(python3 - "$SCRIPTS_DIR" "$TMPDIR_BASE" <<'PY'
+import json, random, sys
+from pathlib import Path
+sys.path.insert(0, sys.argv[1])
+from jsonl_reader import HISTORY_ORDER_SLACK_MS
+from session_parser import find_latest_session, find_latest_session_full_scan
+history = Path(sys.argv[2]) / "random.jsonl"
+mismatches = 0
+for seed in range(300):
+    rng = random.Random(seed)
+    ts = 1_700_000_000_000
+    lines = []
+    for i in range(rng.randint(1, 60)):
+        ts += rng.choice((0, 0, 1000, 60_000, 900_000))
+        entry = {"display": str(i), "project": rng.choice(("/p", "/q", "/r")), "sessionId": f"s{i}"}
+        roll = rng.random()
+        if roll < 0.1:
+            pass  # No timestamp
+        elif roll < 0.3:
+            entry["timestamp"] = ts - rng.randint(0, HISTORY_ORDER_SLACK_MS)
+        else:
+            entry["timestamp"] = ts
+        lines.append(json.dumps(entry))
+    history.write_text("\n".join(lines) + "\n")
+    for project in ("/p", "/q"):
+        if find_latest_session(project, history) != find_latest_session_full_scan(project, history):
+            mismatches += 1
+print(mismatches)
+PY
+)
+assert_eq "mismatches with the full scan" "0" "$MISMATCHES"
+
+if [ "$ERRORS" -gt 0 ]; then
+  echo "test-latest-session: $ERRORS error(s)"
+  exit 1
+fi
+echo "test-latest-session: all passed"
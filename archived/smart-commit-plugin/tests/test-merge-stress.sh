@@ -0,0 +1,56 @@
+#!/bin/bash
+set -euo pipefail
+
+SCRIPT_DIR=$(cd "$(dirname "$0")" && pwd)
+SCRIPTS_DIR="$SCRIPT_DIR/../skills/smart-commit/scripts"
+ERRORS=0
+
+assert_eq() {
+  local label="$1" expected="$2" actual="$3"
+  if [ "$expected" != "$actual" ]; then
+    echo "  FAIL: $label - expected '$expected', got '$actual'"
+    ERRORS=$((ERRORS + 1))
+  else
+    echo "  OK: $label"
+  fi
+}
+
+# Merges GROUPS groups that each touch HOT shared files plus one file of
+# their own; prints "<merged groups> <merge entries> <ops kept> <original
+# groups> <shared files> <hot op kept> <within time limit>"
+merge_stress() {
+  python3 - "$SCRIPTS_DIR" "$1" "$2" "$3" <<'PY'
+import sys, time
+sys.path.insert(0, sys.argv[1])
+from commit_analyzer import FileOp, merge_overlapping_groups
+groups_count, hot_count, limit = int(sys.argv[2]), int(sys.argv[3]), float(sys.argv[4])
+groups = [
+    [FileOp(f"config/hot_{h}.json", timestamp=i * 1000 + h) for h in range(hot_count)]
+    + [FileOp(f"src/module_{i}.py", timestamp=i * 1000)]
+    for i in range(groups_count)
+]
+start = time.perf_counter()
+merged, merge_info = merge_overlapping_groups(groups)
+elapsed = time.perf_counter() - start
+hot = {op.path: op.timestamp for op in merged[0] if op.path.startswith("config/")}
+latest_kept = all(ts == (groups_count - 1) * 1000 + int(p[11:-5]) for p, ts in hot.items())
+print(len(merged), len(merge_info), len(merged[0]), len(merge_info[0]["original"]),
+      len(merge_info[0]["shared_files"]), latest_kept, elapsed < limit)
+PY
+}
+
+# ── Test 1: One hot file ──
+echo "Test 1: 10k groups sharing one hot file"
+assert_eq "one merged group, one entry, latest hot op kept, under 5s" \
+  "1 1 10001 10000 1 True True" "$(merge_stress 10000 1 5)"
+
+# ── Test 2: Many hot files ──
+echo "Test 2: 10k groups sharing 20 hot files"
+assert_eq "one merged group, one entry, latest hot ops kept, under 10s" \
+  "1 1 10020 10000 20 True True" "$(merge_stress 10000 20 10)"
+
+if [ "$ERRORS" -gt 0 ]; then
+  echo "test-merge-stress: $ERRORS error(s)"
+  exit 1
+fi
+echo "test-merge-stress: all passed"
@@ -0,0 +1,101 @@
+#!/bin/bash
+set -euo pipefail
+
+SCRIPT_DIR=$(cd "$(dirname "$0")" && pwd)
+SCRIPTS_DIR="$SCRIPT_DIR/../skills/smart-commit/scripts"
+FIXTURE="$SCRIPT_DIR/fixtures/session.jsonl"
+TMPDIR_BASE=$(mktemp -d)
+ERRORS=0
+
+cleanup() {
+  rm -rf "$TMPDIR_BASE"
+}
+trap cleanup EXIT
+
+assert_same() {
+  local label="$1" expected="$2" actual="$3"
+  if cmp -s "$expected" "$actual"; then
+    echo "  OK: $label"
+  else
+    echo "  FAIL: $label - outputs differ"
+    diff "$expected" "$actual" | head -20
+    ERRORS=$((ERRORS + 1))
+  fi
+}
+
+assert_eq() {
+  local label="$1" expected="$2" actual="$3"
+  if [ "$expected" != "$actual" ]; then
+    echo "  FAIL: $label - expected '$expected', got '$actual'"
+    ERRORS=$((ERRORS + 1))
+  else
+    echo "  OK: $label"
+  fi
+}
+
+# The fixture mixes malformed, blank and whitespace-only lines, tool results
+# full of quoted marker strings, payloads with escaped quotes, Korean text,
+# snapshots and a numeric timestamp
+PROJECT="/work/fixture"
+SESSION_ID="5f0c2a1e-7b3d-4c8e-9a21-0d6e4b7f3c90"
+export HOME="$TMPDIR_BASE/home"
+mkdir -p "$HOME/.claude/projects/-work-fixture"
+cp "$FIXTURE" "$HOME/.claude/projects/-work-fixture/$SESSION_ID.jsonl"
+
+parse() {
+  python3 "$SCRIPTS_DIR/parse-session.py" --project "$PROJECT" --session "$SESSION_ID" "$@"
+}
+
+# ── Test 1: Default output ──
+echo "Test 1: Prefilter and --strict produce identical JSON"
+parse > "$TMPDIR_BASE/prefilter.json"
+parse --strict > "$TMPDIR_BASE/strict.json"
+assert_same "JSON output" "$TMPDIR_BASE/strict.json" "$TMPDIR_BASE/prefilter.json"
+
+COUNTS=$(python3 -c '
+import json, sys
+d = json.load(open(sys.argv[1]))
+print(len(d["user_messages"]), len(d["file_ops"]), len(d["snapshots"]))
+' "$TMPDIR_BASE/strict.json")
+assert_eq "user messages, file ops, snapshots" "3 6 2" "$COUNTS"
+
+# ── Test 2: Without snapshots ──
+echo "Test 2: Prefilter and --strict agree with --no-snapshots"
+parse --no-snapshots > "$TMPDIR_BASE/prefilter.json"
+parse --no-snapshots --strict > "$TMPDIR_BASE/strict.json"
+assert_same "JSON output" "$TMPDIR_BASE/strict.json" "$TMPDIR_BASE/prefilter.json"
+
+# ── Test 3: NDJSON records ──
+echo "Test 3: Prefilter and --strict agree with --format ndjson"
+parse --format ndjson > "$TMPDIR_BASE/prefilter.ndjson"
+parse --format ndjson --strict > "$TMPDIR_BASE/strict.ndjson"
+assert_same "NDJSON output" "$TMPDIR_BASE/strict.ndjson" "$TMPDIR_BASE/prefilter.ndjson"
+
+# ── Test 4: Resumed from a checkpoint ──
+echo "Test 4: Prefilter and --strict agree when resuming a checkpoint"
+head -n 12 "$FIXTURE" > "$HOME/.claude/projects/-work-fixture/$SESSION_ID.jsonl"
+parse --checkpoint > /dev/null
+cp "$FIXTURE" "$HOME/.claude/projects/-work-fixture/$SESSION_ID.jsonl"
+parse --checkpoint > "$TMPDIR_BASE/prefilter.json"
+parse --strict > "$TMPDIR_BASE/strict.json"
+assert_same "Resumed JSON output" "$TMPDIR_BASE/strict.json" "$TMPDIR_BASE/prefilter.json"
+
+# ── Test 5: Line counters ──
+echo "Test 5: Prefilter and --strict count the same malformed and blank lines"
+parse --no-snapshots --metrics-json "$TMPDIR_BASE/prefilter-metrics.json" > /dev/null
+parse --no-snapshots --strict --metrics-json "$TMPDIR_BASE/strict-metrics.json" > /dev/null
+line_counts() {
+  python3 -c '
+import json, sys
+c = json.load(open(sys.argv[1]))["counters"]
+print(c["lines_read"], c["lines_malformed"], c["lines_blank"])
+' "$1"
+}
+assert_eq "--strict lines read, malformed, blank" "25 3 2" "$(line_counts "$TMPDIR_BASE/strict-metrics.json")"
+assert_eq "prefilter lines read, malformed, blank" "25 3 2" "$(line_counts "$TMPDIR_BASE/prefilter-metrics.json")"
+
+if [ "$ERRORS" -gt 0 ]; then
+  echo "test-strict-parity: $ERRORS error(s)"
+  exit 1
+fi
+echo "test-strict-parity: all passed"
@@ -7,14 +7,46 @@ groups them by project/ticket, and generates a markdown summary.
 """
 
 import argparse
+import calendar
+import hashlib
 import json
 import os
 import re
+import sqlite3
 import sys
+import tempfile
+from bisect import bisect_right
 from collections import defaultdict
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import Optional
+from typing import Iterable, Iterator, Optional
+
+import session_catalog
+from jsonl_reader import HISTORY_ORDER_SLACK_MS, bisect_lines, iter_jsonl, iter_lines, loads_line
+
+# Section hash and file stat of each daily file written by a range report, so
+# unchanged days are skipped without reading the file
+SECTION_HASHES_FILE = Path.home() / ".claude" / "cache" / "worktrace" / "section-hashes.json"
+
+# Activity digest of each session file per day, keyed by path and day and
+# valid while the file's size and mtime are unchanged (see SessionDigests)
+SESSION_DIGESTS_FILE = Path.home() / ".claude" / "cache" / "worktrace" / "session-digests.sqlite"
+# Bump when digest_session() changes what it counts, to discard old digests
+SESSION_DIGEST_VERSION = 2
+
+# Gaps between session entries longer than this count as idle, not active time
+SESSION_IDLE_GAP_MS = 15 * 60 * 1000
+
+# Tools whose file_path (notebook_path) counts as an edited file
+EDIT_TOOLS = ("Edit", "MultiEdit", "Write", "NotebookEdit")
+
+# Raw byte markers of lines digest_session() decodes; other lines only
+# contribute their timestamp. Tool results are user entries too, but they hold
+# most of a transcript's bytes (file contents, command output) and are never
+# prompts, so lines with TOOL_RESULT_MARKER are not decoded.
+DIGEST_MARKERS = (b'"user"', b'"human"', b'"tool_use"')
+TOOL_RESULT_MARKER = b'"tool_result"'
+TIMESTAMP_RE = re.compile(rb'"timestamp"\s*:\s*(?:"([^"]*)"|(\d+))')
 
 
 def get_start_of_day_epoch_ms(date_str: Optional[str] = None, tz_name: Optional[str] = None) -> int:
@@ -47,41 +79,109 @@ def get_start_of_day_epoch_ms(date_str: Optional[str] = None, tz_name: Optional[
     return int(start_of_day.timestamp() * 1000)
 
 
-def load_history(history_file: Path) -> list[dict]:
-    """Load history entries from JSONL file.
+def load_history(history_file: Path, start_epoch_ms: Optional[int] = None,
+                 end_epoch_ms: Optional[int] = None) -> Iterator[dict]:
+    """Lazily load history entries from JSONL file.
+
+    With a time window, only the lines around [start_epoch_ms, end_epoch_ms)
+    are read (see read_history_range()); callers still filter by date.
 
     Args:
         history_file: Path to history.jsonl file.
+        start_epoch_ms: Start of the window in epoch milliseconds (optional).
+        end_epoch_ms: End of the window in epoch milliseconds (optional).
 
     Returns:
-        List of history entry dictionaries.
+        Iterator over history entry dictionaries.
+    """
+    if start_epoch_ms is None or end_epoch_ms is None:
+        return iter_jsonl(history_file)
+    return iter(read_history_range(history_file, start_epoch_ms, end_epoch_ms))
+
+
+def history_line_timestamp(line: bytes) -> Optional[int]:
+    """Return the timestamp of a raw history line, or None if it has none."""
+    try:
+        ts = loads_line(line).get("timestamp")
+    except (ValueError, AttributeError):
+        return None
+    return ts if isinstance(ts, (int, float)) else None
+
+
+def read_history_range(history_file: Path, start_epoch_ms: int, end_epoch_ms: int) -> list[dict]:
+    """Read the history entries with start_epoch_ms <= timestamp < end_epoch_ms.
+
+    The start of the window is found by binary search over byte offsets, and
+    reading stops past its end, so only the lines in (and near) the window
+    are decoded. Entries up to HISTORY_ORDER_SLACK_MS out of order are still
+    found, and so is the window around a single stray entry; if the window
+    turns out to be more out of order than that, the whole file is scanned
+    instead. A pipe or FIFO can only be read once, so it is always filtered
+    in a single full pass.
+
+    Args:
+        history_file: Path to history.jsonl file.
+        start_epoch_ms: Start epoch timestamp in milliseconds (inclusive).
+        end_epoch_ms: End epoch timestamp in milliseconds (exclusive).
+
+    Returns:
+        List of entries in the window, in file order.
     """
-    entries = []
     if not history_file.exists():
-        return entries
-
-    with open(history_file, "r", encoding="utf-8") as f:
-        for line in f:
-            line = line.strip()
-            if line:
-                try:
-                    entries.append(json.loads(line))
-                except json.JSONDecodeError:
-                    continue
+        return []
+    if not history_file.is_file():
+        return filter_entries_by_date(iter_jsonl(history_file), start_epoch_ms, end_epoch_ms)
+
+    offset = bisect_lines(history_file, history_line_timestamp, start_epoch_ms - HISTORY_ORDER_SLACK_MS,
+                          probe=2)
+    entries = []
+    latest_ts = None
+    past_end = 0  # Consecutive entries after the window; one alone may be a stray
+    for _, line in iter_lines(history_file, offset):
+        if line.isspace():
+            continue
+        try:
+            entry = loads_line(line)
+        except ValueError:
+            continue
+        ts = entry.get("timestamp") if isinstance(entry, dict) else None
+        if not isinstance(ts, (int, float)):
+            continue
+        if latest_ts is not None and ts < latest_ts - HISTORY_ORDER_SLACK_MS:
+            # Too far out of order for the binary search to be trusted
+            return filter_entries_by_date(iter_jsonl(history_file), start_epoch_ms, end_epoch_ms)
+        latest_ts = ts if latest_ts is None else max(latest_ts, ts)
+        if ts >= end_epoch_ms + HISTORY_ORDER_SLACK_MS:
+            past_end += 1
+            if past_end == 2:
+                break
+            continue
+        past_end = 0
+        if start_epoch_ms <= ts < end_epoch_ms:
+            entries.append(entry)
     return entries
 
 
-def filter_entries_by_date(entries: list[dict], start_epoch_ms: int) -> list[dict]:
-    """Filter history entries to only include those from the given start time.
+def filter_entries_by_date(entries: Iterable[dict], start_epoch_ms: int,
+                           end_epoch_ms: Optional[int] = None) -> list[dict]:
+    """Filter history entries to those within [start_epoch_ms, end_epoch_ms).
 
     Args:
-        entries: List of history entries.
+        entries: Iterable of history entries.
         start_epoch_ms: Start epoch timestamp in milliseconds.
+        end_epoch_ms: End epoch timestamp in milliseconds (no end bound if None).
 
     Returns:
         Filtered list of entries.
     """
-    return [e for e in entries if e.get("timestamp", 0) >= start_epoch_ms]
+    in_window = []
+    for e in entries:
+        ts = e.get("timestamp") if isinstance(e, dict) else None
+        if not isinstance(ts, (int, float)) or ts < start_epoch_ms:
+            continue
+        if end_epoch_ms is None or ts < end_epoch_ms:
+            in_window.append(e)
+    return in_window
 
 
 def extract_ticket(project_path: str, patterns: list[str]) -> Optional[str]:
@@ -141,16 +241,16 @@ def encode_project_path(path: str) -> str:
     return re.sub(r"[/.]", "-", path)
 
 
-def find_session_ids(project_path: str, start_epoch_ms: int, end_epoch_ms: int) -> list[str]:
-    """Find session IDs for a project within the given time range.
+def scan_session_spans(project_path: str) -> list[tuple[str, Optional[int], Optional[int]]]:
+    """Read the first and last entry timestamps of every session file of a project.
+
+    Fallback for when the session catalog is unavailable.
 
     Args:
         project_path: Full project path.
-        start_epoch_ms: Start epoch timestamp in milliseconds.
-        end_epoch_ms: End epoch timestamp in milliseconds.
 
     Returns:
-        List of session IDs active during the time range.
+        List of (session ID, first timestamp, last timestamp) in epoch ms.
     """
     encoded = encode_project_path(project_path)
     sessions_dir = Path.home() / ".claude" / "projects" / encoded
@@ -158,39 +258,359 @@ def find_session_ids(project_path: str, start_epoch_ms: int, end_epoch_ms: int)
     if not sessions_dir.exists():
         return []
 
-    session_ids = []
+    sessions = []
     for session_file in sessions_dir.glob("*.jsonl"):
         # Skip non-UUID files (like agent-*.jsonl)
         session_id = session_file.stem
-        if not re.match(r"^[a-f0-9]{8}-[a-f0-9]{4}-[a-f0-9]{4}-[a-f0-9]{4}-[a-f0-9]{12}$", session_id):
+        if not re.match(session_catalog.SESSION_ID_PATTERN, session_id):
             continue
+        first_ts, last_ts = session_catalog.read_session_timestamps(session_file)
+        sessions.append((session_id, first_ts, last_ts))
 
-        # Check first few lines for timestamp
-        try:
-            with open(session_file, "r", encoding="utf-8") as f:
-                for i, line in enumerate(f):
-                    if i > 5:  # Only check first few lines
-                        break
-                    try:
-                        entry = json.loads(line)
-                        ts = entry.get("timestamp")
-                        if ts:
-                            # Handle ISO format timestamp
-                            if isinstance(ts, str):
-                                dt = datetime.fromisoformat(ts.replace("Z", "+00:00"))
-                                ts_ms = int(dt.timestamp() * 1000)
-                            else:
-                                ts_ms = ts
-
-                            if start_epoch_ms <= ts_ms <= end_epoch_ms:
-                                session_ids.append(session_id)
-                                break
-                    except (json.JSONDecodeError, ValueError):
-                        continue
-        except (IOError, OSError):
+    return sessions
+
+
+def session_file_path(project_path: str, session_id: str) -> Path:
+    """Path of a session's JSONL file under ~/.claude/projects."""
+    return Path.home() / ".claude" / "projects" / encode_project_path(project_path) / f"{session_id}.jsonl"
+
+
+def extract_prompt_text(content) -> Optional[str]:
+    """Return the text typed by the user in a user message's content, if any.
+
+    Tool results are also recorded as user messages; those have no text blocks.
+    """
+    if isinstance(content, str):
+        return content.strip() or None
+    if isinstance(content, list):
+        texts = [
+            block.get("text", "") if isinstance(block, dict) else block
+            for block in content
+            if (isinstance(block, dict) and block.get("type") == "text") or isinstance(block, str)
+        ]
+        return " ".join(texts).strip() or None
+    return None
+
+
+def digest_session(session_file: Path, bounds: list[int]) -> list[dict]:
+    """Summarize a session file's activity per time window in one streaming pass.
+
+    Only lines carrying a user message or a tool call are decoded (see
+    DIGEST_MARKERS), not tool results; the timestamps of the others are read
+    from the raw bytes, so a cold pass costs time in proportion to prompt and
+    tool-call volume rather than transcript size.
+    An entry without a timestamp counts in the window of the entry before it;
+    entries before the first timestamp are not counted.
+
+    Args:
+        session_file: Path to the session JSONL file.
+        bounds: Ascending window boundaries in epoch milliseconds; window i
+            is [bounds[i], bounds[i + 1]).
+
+    Returns:
+        One dictionary per window with first_ts, last_ts, active_ms (time
+        between consecutive entries inside the window, excluding gaps over
+        SESSION_IDLE_GAP_MS), prompts, tool_calls and files_edited (sorted
+        paths).
+
+    Raises:
+        OSError: If the file cannot be read.
+    """
+    count = len(bounds) - 1
+    digests = [
+        {"first_ts": None, "last_ts": None, "active_ms": 0, "prompts": 0, "tool_calls": 0,
+         "files_edited": set()}
+        for _ in range(count)
+    ]
+    prev_ts = None
+    window = None
+
+    for _, line in iter_lines(session_file):
+        entry = None
+        if TOOL_RESULT_MARKER not in line and any(marker in line for marker in DIGEST_MARKERS):
+            try:
+                entry = loads_line(line)
+            except ValueError:
+                continue
+            if not isinstance(entry, dict):
+                continue
+            ts = session_catalog.to_epoch_ms(entry.get("timestamp"))
+        else:
+            match = TIMESTAMP_RE.search(line)
+            ts = None
+            if match:
+                raw = match.group(1)
+                ts = session_catalog.to_epoch_ms(raw.decode("utf-8", "replace") if raw is not None
+                                                 else int(match.group(2)))
+
+        if ts:
+            i = bisect_right(bounds, ts) - 1
+            window = digests[i] if 0 <= i < count else None
+            if window is not None:
+                if window["first_ts"] is None or ts < window["first_ts"]:
+                    window["first_ts"] = ts
+                if window["last_ts"] is None or ts > window["last_ts"]:
+                    window["last_ts"] = ts
+            # A gap across a window boundary counts for neither window, so
+            # active time never exceeds the window's first-to-last span
+            if (window is not None and prev_ts is not None and prev_ts >= bounds[i]
+                    and 0 < ts - prev_ts <= SESSION_IDLE_GAP_MS):
+                window["active_ms"] += ts - prev_ts
+            prev_ts = ts if prev_ts is None else max(prev_ts, ts)
+
+        if entry is None or window is None:
             continue
+        # Claude Code nests the message under "message"; older logs inline it
+        message = entry.get("message")
+        content = message.get("content") if isinstance(message, dict) else None
+        if content is None:
+            content = entry.get("content")
+        entry_type = entry.get("type")
+        role = entry.get("role")
+        if entry_type in ("user", "human") or role in ("user", "human"):
+            if not entry.get("isMeta") and extract_prompt_text(content):
+                window["prompts"] += 1
+        elif (entry_type == "assistant" or role == "assistant") and isinstance(content, list):
+            for block in content:
+                if not isinstance(block, dict) or block.get("type") != "tool_use":
+                    continue
+                window["tool_calls"] += 1
+                inp = block.get("input")
+                if block.get("name") in EDIT_TOOLS and isinstance(inp, dict):
+                    path = inp.get("file_path") or inp.get("notebook_path")
+                    if isinstance(path, str) and path:
+                        window["files_edited"].add(path)
+
+    for digest in digests:
+        digest["files_edited"] = sorted(digest["files_edited"])
+    return digests
+
+
+class SessionDigests:
+    """Persistent cache of digest_session() results, one row per session and day.
+
+    Digests are stored in ~/.claude/cache/worktrace/session-digests.sqlite
+    with the size and mtime of the file they were computed from, so an
+    unchanged session costs one stat() and one row lookup per day; a session
+    that grew or changed is digested again, for every day of the run at
+    once. If the cache cannot be opened, digests are computed every time.
+    """
+
+    def __init__(self, cache_file: Path = SESSION_DIGESTS_FILE):
+        self._cache_file = cache_file
+        self._conn = None
+        self._opened = False
+
+    def _open(self) -> Optional[sqlite3.Connection]:
+        if not self._opened:
+            self._opened = True
+            try:
+                self._cache_file.parent.mkdir(parents=True, exist_ok=True)
+                conn = sqlite3.connect(str(self._cache_file), timeout=5)
+                if conn.execute("PRAGMA user_version").fetchone()[0] != SESSION_DIGEST_VERSION:
+                    conn.executescript("""
+                        DROP TABLE IF EXISTS digests;
+                        CREATE TABLE digests (
+                            path TEXT NOT NULL,
+                            start_ms INTEGER NOT NULL,
+                            end_ms INTEGER NOT NULL,
+                            size INTEGER NOT NULL,
+                            mtime_ns INTEGER NOT NULL,
+                            digest TEXT NOT NULL,
+                            PRIMARY KEY (path, start_ms, end_ms)
+                        );
+                    """)
+                    conn.execute(f"PRAGMA user_version = {SESSION_DIGEST_VERSION}")
+                    conn.commit()
+                self._conn = conn
+            except (OSError, sqlite3.Error):
+                self._conn = None
+        return self._conn
+
+    def get(self, session_file: Path, start_epoch_ms: int, end_epoch_ms: int,
+            bounds: Optional[list[int]] = None) -> Optional[dict]:
+        """Return a session's digest for one window, or None if it cannot be read.
+
+        Args:
+            session_file: Path to the session JSONL file.
+            start_epoch_ms: Window start epoch timestamp in milliseconds.
+            end_epoch_ms: Window end epoch timestamp in milliseconds.
+            bounds: Boundaries of every window of the run (see
+                digest_session()). On a cache miss, the windows among them
+                that the session spans are digested and stored together, so
+                a multi-day session is read once per run. Defaults to just
+                this window.
+
+        Returns:
+            Digest from digest_session(), cached or freshly computed.
+        """
+        try:
+            st = session_file.stat()
+        except OSError:
+            return None
+        conn = self._open()
+        if conn:
+            try:
+                row = conn.execute(
+                    "SELECT digest FROM digests WHERE path = ? AND start_ms = ? AND end_ms = ?"
+                    " AND size = ? AND mtime_ns = ?",
+                    (str(session_file), start_epoch_ms, end_epoch_ms, st.st_size, st.st_mtime_ns),
+                ).fetchone()
+                if row:
+                    return json.loads(row[0])
+            except (sqlite3.Error, ValueError):
+                pass
+
+        i = bisect_right(bounds, start_epoch_ms) - 1 if bounds else -1
+        if not (0 <= i < len(bounds) - 1 and bounds[i] == start_epoch_ms
+                and bounds[i + 1] == end_epoch_ms):
+            bounds, i = [start_epoch_ms, end_epoch_ms], 0
+        try:
+            digests = digest_session(session_file, bounds)
+        except OSError:
+            return None
+        if conn:
+            # Store the windows the session spans, including idle days in
+            # between, so that later lookups of any of them are hits
+            active = [j for j, digest in enumerate(digests) if digest["first_ts"] is not None]
+            stored = range(min(active + [i]), max(active + [i]) + 1)
+            rows = [
+                (str(session_file), bounds[j], bounds[j + 1], st.st_size, st.st_mtime_ns,
+                 json.dumps(digests[j]))
+                for j in stored
+            ]
+            try:
+                with conn:
+                    conn.execute(
+                        "DELETE FROM digests WHERE path = ? AND (size != ? OR mtime_ns != ?)",
+                        (str(session_file), st.st_size, st.st_mtime_ns),
+                    )
+                    conn.executemany("INSERT OR REPLACE INTO digests VALUES (?, ?, ?, ?, ?, ?)", rows)
+            except sqlite3.Error:
+                pass
+        return digests[i]
+
+    def close(self) -> None:
+        """Close the cache connection, if one was opened."""
+        if self._conn:
+            self._conn.close()
+            self._conn = None
+
+
+class SessionFinder:
+    """Memoized session lookups, shared by every group (and day) of a run.
+
+    A session is found for a window if its first-to-last entry span overlaps
+    it, so sessions started on an earlier day are included. Each project's
+    catalog rows are refreshed once per run rather than once per history
+    entry, over a single catalog connection, and each (project, start, end)
+    result is kept. The catalog itself persists between runs and only
+    re-reads session files whose size or mtime changed. When it is
+    unavailable, each project directory is scanned once and later windows
+    are answered from that scan.
+
+    Args:
+        bounds: Day boundaries of the run in epoch milliseconds, so that a
+            session spanning several days is digested once (see
+            SessionDigests.get()). Defaults to digesting each window alone.
+    """
+
+    def __init__(self, bounds: Optional[list[int]] = None):
+        self._bounds = bounds
+        self._conn = None
+        self._opened = False
+        self._refreshed = set()
+        self._scanned = {}
+        self._results = {}
+        self._digests = SessionDigests()
+        self._digested = {}
+
+    def find(self, project_path: str, start_epoch_ms: int, end_epoch_ms: int) -> list[str]:
+        """Find session IDs for a project within the given time range.
+
+        Args:
+            project_path: Full project path.
+            start_epoch_ms: Start epoch timestamp in milliseconds.
+            end_epoch_ms: End epoch timestamp in milliseconds.
+
+        Returns:
+            List of session IDs active during the time range.
+        """
+        key = (project_path, start_epoch_ms, end_epoch_ms)
+        if key not in self._results:
+            self._results[key] = self._lookup(project_path, start_epoch_ms, end_epoch_ms)
+        return self._results[key]
+
+    def _lookup(self, project_path: str, start_epoch_ms: int, end_epoch_ms: int) -> list[str]:
+        if not self._opened:
+            self._conn = session_catalog.open_catalog()
+            self._opened = True
+        if self._conn:
+            try:
+                if project_path not in self._refreshed:
+                    session_catalog.refresh_project(self._conn, project_path)
+                    self._refreshed.add(project_path)
+                return session_catalog.sessions_active_between(
+                    self._conn, project_path, start_epoch_ms, end_epoch_ms
+                )
+            except sqlite3.Error:
+                pass  # Fall back to scanning the directory
+
+        if project_path not in self._scanned:
+            self._scanned[project_path] = scan_session_spans(project_path)
+        return sorted(
+            session_id for session_id, first_ts, last_ts in self._scanned[project_path]
+            if first_ts is not None and first_ts <= end_epoch_ms and (last_ts or first_ts) >= start_epoch_ms
+        )
+
+    def digest(self, project_path: str, session_id: str, start_epoch_ms: int,
+               end_epoch_ms: int) -> Optional[dict]:
+        """Return the activity digest of a session within a time window.
+
+        Args:
+            project_path: Full project path.
+            session_id: Session ID.
+            start_epoch_ms: Start epoch timestamp in milliseconds.
+            end_epoch_ms: End epoch timestamp in milliseconds.
+
+        Returns:
+            Digest dictionary from digest_session() covering only entries
+            inside the window, or None if the session file cannot be read.
+        """
+        key = (project_path, session_id, start_epoch_ms, end_epoch_ms)
+        if key not in self._digested:
+            self._digested[key] = self._digests.get(session_file_path(project_path, session_id),
+                                                    start_epoch_ms, end_epoch_ms, self._bounds)
+        return self._digested[key]
+
+    def close(self) -> None:
+        """Close the catalog and digest cache connections, if opened."""
+        if self._conn:
+            self._conn.close()
+            self._conn = None
+        self._digests.close()
+
+
+def find_session_ids(project_path: str, start_epoch_ms: int, end_epoch_ms: int) -> list[str]:
+    """Find session IDs for a project within the given time range.
+
+    Queries the shared session catalog (see session_catalog.py) and falls back
+    to scanning the project's session directory if it is unavailable. For
+    repeated lookups, use one SessionFinder instead.
+
+    Args:
+        project_path: Full project path.
+        start_epoch_ms: Start epoch timestamp in milliseconds.
+        end_epoch_ms: End epoch timestamp in milliseconds.
 
-    return session_ids
+    Returns:
+        List of session IDs active during the time range.
+    """
+    finder = SessionFinder()
+    try:
+        return finder.find(project_path, start_epoch_ms, end_epoch_ms)
+    finally:
+        finder.close()
 
 
 def format_time(timestamp_ms: int) -> str:
@@ -206,6 +626,51 @@ def format_time(timestamp_ms: int) -> str:
     return dt.strftime("%H:%M")
 
 
+def format_duration(duration_ms: int) -> str:
+    """Format a duration as e.g. "1h 05m" or "12m".
+
+    Args:
+        duration_ms: Duration in milliseconds.
+
+    Returns:
+        Formatted duration string.
+    """
+    minutes = round(duration_ms / 60000)
+    if minutes < 60:
+        return f"{minutes}m"
+    return f"{minutes // 60}h {minutes % 60:02d}m"
+
+
+def plural(count: int, noun: str) -> str:
+    """Format a count with its noun, e.g. "1 prompt" or "3 prompts"."""
+    return f"{count} {noun}" if count == 1 else f"{count} {noun}s"
+
+
+def session_activity(session_id: str, digest: dict) -> dict:
+    """Build the per-session activity record of a report from a session digest.
+
+    Args:
+        session_id: Session ID.
+        digest: Digest from digest_session().
+
+    Returns:
+        Dictionary with session_id, started/ended (epoch ms of the first and
+        last entry in the digest's window), duration_ms, active_ms, prompts,
+        tool_calls and files_edited (count).
+    """
+    first_ts, last_ts = digest["first_ts"], digest["last_ts"]
+    return {
+        "session_id": session_id,
+        "started": first_ts,
+        "ended": last_ts,
+        "duration_ms": last_ts - first_ts if first_ts is not None and last_ts is not None else 0,
+        "active_ms": digest["active_ms"],
+        "prompts": digest["prompts"],
+        "tool_calls": digest["tool_calls"],
+        "files_edited": len(digest["files_edited"]),
+    }
+
+
 def summarize_activity(display: str, max_length: int = 60) -> str:
     """Summarize activity from display text.
 
@@ -230,7 +695,8 @@ def group_by_ticket_and_project(
     entries: list[dict],
     ticket_patterns: list[str],
     start_epoch_ms: int = 0,
-    end_epoch_ms: int = 0
+    end_epoch_ms: int = 0,
+    finder: Optional[SessionFinder] = None
 ) -> dict[str, dict]:
     """Group entries by ticket number or project.
 
@@ -239,11 +705,19 @@ def group_by_ticket_and_project(
         ticket_patterns: List of regex patterns for ticket matching.
         start_epoch_ms: Start epoch for session lookup.
         end_epoch_ms: End epoch for session lookup.
+        finder: Session lookup cache to share across calls. Defaults to a
+            new one for this call.
 
     Returns:
-        Dictionary mapping group keys to group info (entries, directory, session_ids).
+        Dictionary mapping group keys to group info (entries, directory,
+        session_ids, and with a time range, sessions: per-session activity
+        from session_activity(), plus files_edited: distinct files edited
+        across them).
     """
-    groups = defaultdict(lambda: {"entries": [], "directory": "", "session_ids": set()})
+    groups = defaultdict(lambda: {"entries": [], "directory": "", "session_ids": {}})
+    own_finder = finder is None
+    if own_finder:
+        finder = SessionFinder()
 
     for entry in entries:
         project = entry.get("project", "")
@@ -260,17 +734,33 @@ def group_by_ticket_and_project(
 
         # Find session IDs for this project
         if start_epoch_ms and end_epoch_ms:
-            session_ids = find_session_ids(project, start_epoch_ms, end_epoch_ms)
-            groups[key]["session_ids"].update(session_ids)
+            for session_id in finder.find(project, start_epoch_ms, end_epoch_ms):
+                groups[key]["session_ids"].setdefault(session_id, project)
 
-    # Convert sets to sorted lists
+    # Convert session maps to sorted lists
     result = {}
     for key, value in groups.items():
+        session_ids = sorted(value["session_ids"])
         result[key] = {
             "entries": value["entries"],
             "directory": value["directory"],
-            "session_ids": sorted(value["session_ids"])
+            "session_ids": session_ids
         }
+        if start_epoch_ms and end_epoch_ms:
+            sessions = []
+            files = set()
+            for session_id in session_ids:
+                digest = finder.digest(value["session_ids"][session_id], session_id,
+                                       start_epoch_ms, end_epoch_ms)
+                # A session can span the window without an entry inside it
+                if digest and digest["first_ts"] is not None:
+                    sessions.append(session_activity(session_id, digest))
+                    files.update(digest["files_edited"])
+            result[key]["sessions"] = sessions
+            result[key]["files_edited"] = len(files)
+
+    if own_finder:
+        finder.close()
 
     return result
 
@@ -315,6 +805,18 @@ def generate_markdown(
                     sessions_str += f" (+{len(session_ids) - 3} more)"
                 lines.append(f"- **Sessions**: {sessions_str}")
 
+        # Add session activity totals
+        sessions = group_info.get("sessions", [])
+        if sessions:
+            active_ms = sum(s["active_ms"] for s in sessions)
+            prompts = sum(s["prompts"] for s in sessions)
+            tool_calls = sum(s["tool_calls"] for s in sessions)
+            files_edited = group_info.get("files_edited", 0)
+            lines.append(
+                f"- **Activity**: {format_duration(active_ms)} active, {plural(prompts, 'prompt')}, "
+                f"{plural(tool_calls, 'tool call')}, {plural(files_edited, 'file')} edited"
+            )
+
         # Deduplicate and summarize activities
         seen = set()
         for entry in entries:
@@ -330,6 +832,323 @@ def generate_markdown(
     return "\n".join(lines)
 
 
+def build_json_report(date_str: str, entries: list[dict], groups: dict[str, dict]) -> dict:
+    """Build the --json document for one day.
+
+    Args:
+        date_str: Date in YYYY-MM-DD format.
+        entries: History entries of the day.
+        groups: Grouped entries from group_by_ticket_and_project().
+
+    Returns:
+        JSON-serializable report dictionary.
+    """
+    return {
+        "date": date_str,
+        "entries_count": len(entries),
+        "groups": {
+            k: {
+                "directory": v["directory"],
+                "session_ids": v["session_ids"],
+                "sessions": v.get("sessions", []),
+                "files_edited": v.get("files_edited", 0),
+                "activities": [e.get("display", "") for e in v["entries"]]
+            }
+            for k, v in groups.items()
+        }
+    }
+
+
+def merge_section(content: str, output: str, section_title: str) -> str:
+    """Replace the section in a daily file's content, or add it if missing.
+
+    Args:
+        content: Current file content.
+        output: Section content, starting with section_title.
+        section_title: Title of the section to replace.
+
+    Returns:
+        Updated file content.
+    """
+    # Find and replace section
+    section_pattern = rf"({re.escape(section_title)})\n[\s\S]*?(?=\n## |\Z)"
+    if re.search(section_pattern, content):
+        return re.sub(section_pattern, output.rstrip(), content)
+
+    # Append section after first heading
+    first_heading = re.search(r"^# .+$", content, re.MULTILINE)
+    if first_heading:
+        pos = first_heading.end()
+        return content[:pos] + "\n\n" + output + content[pos:]
+    return content + "\n\n" + output
+
+
+def write_atomic(path: Path, text: str, mode: Optional[int] = None) -> None:
+    """Write text to path via a temporary file and rename, so readers never see a partial file.
+
+    A symlinked destination (e.g. a daily note linked in from a notes vault)
+    is written through: the link's target is replaced, not the link.
+
+    Args:
+        path: Destination file.
+        text: Content to write.
+        mode: Permission bits for a new file (an existing file keeps its own).
+    """
+    path = path.resolve()
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+        try:
+            os.chmod(tmp_name, path.stat().st_mode & 0o7777)
+        except FileNotFoundError:
+            if mode is not None:
+                os.chmod(tmp_name, mode)
+        os.replace(tmp_name, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except OSError:
+            pass
+        raise
+
+
+def default_file_mode() -> int:
+    """Permission bits open() would give a new file under the current umask."""
+    umask = os.umask(0)
+    os.umask(umask)
+    return 0o666 & ~umask
+
+
+def update_daily_file(output_file: Path, output: str, section_title: str) -> bool:
+    """Write output into a daily file, replacing only its section if the file exists.
+
+    Args:
+        output_file: Path of the daily file.
+        output: Section content, starting with section_title.
+        section_title: Title of the section to replace.
+
+    Returns:
+        True if the file was written, False if it already had this content.
+    """
+    if output_file.exists():
+        with open(output_file, "r", encoding="utf-8") as f:
+            content = f.read()
+        updated = merge_section(content, output, section_title)
+        if updated == content:
+            return False
+    else:
+        updated = output
+    write_atomic(output_file, updated, default_file_mode())
+    return True
+
+
+def section_hash(output: str) -> str:
+    """Content hash of a generated section."""
+    return hashlib.blake2b(output.rstrip().encode("utf-8"), digest_size=16).hexdigest()
+
+
+def load_section_hashes(hashes_file: Path = SECTION_HASHES_FILE) -> dict:
+    """Load the recorded section hashes, or an empty mapping if unavailable."""
+    try:
+        with open(hashes_file, "r", encoding="utf-8") as f:
+            hashes = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+    return hashes if isinstance(hashes, dict) else {}
+
+
+def save_section_hashes(hashes: dict, hashes_file: Path = SECTION_HASHES_FILE) -> None:
+    """Persist section hashes; failures only cost a re-check next run."""
+    try:
+        hashes_file.parent.mkdir(parents=True, exist_ok=True)
+        write_atomic(hashes_file, json.dumps(hashes, sort_keys=True))
+    except OSError:
+        pass
+
+
+def sync_daily_file(output_file: Path, output: str, section_title: str,
+                    recorded: Optional[dict], mode: int) -> tuple[bool, Optional[dict]]:
+    """Bring one daily file up to date, skipping it if its section is known to be current.
+
+    A file is skipped without being read when the recorded section hash
+    matches and its size and mtime are unchanged since it was recorded.
+
+    Args:
+        output_file: Path of the daily file.
+        output: Section content, starting with section_title.
+        section_title: Title of the section to replace.
+        recorded: Record saved for this file by the previous run, if any.
+        mode: Permission bits for a new file.
+
+    Returns:
+        (whether the file was written, record to save for it).
+    """
+    digest = section_hash(output)
+    try:
+        st = output_file.stat()
+    except FileNotFoundError:
+        st = None
+    if st and recorded == {"hash": digest, "size": st.st_size, "mtime_ns": st.st_mtime_ns}:
+        return False, recorded
+
+    if st:
+        with open(output_file, "r", encoding="utf-8") as f:
+            content = f.read()
+        updated = merge_section(content, output, section_title)
+    else:
+        content, updated = None, output
+    written = updated != content
+    if written:
+        write_atomic(output_file, updated, mode)
+    st = output_file.stat()
+    return written, {"hash": digest, "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+
+def write_daily_files(
+    outputs: list[tuple[str, str]],
+    output_dir: Path,
+    section_title: str,
+    workers: int
+) -> tuple[int, int]:
+    """Update the daily files of many days in parallel.
+
+    Each file is replaced atomically (write to a temporary file, then rename),
+    and days whose section content hash is unchanged are skipped (see
+    sync_daily_file()).
+
+    Args:
+        outputs: (date, section content) per day.
+        output_dir: Directory of the daily files, created if missing.
+        section_title: Title of the section to replace.
+        workers: Number of writer threads.
+
+    Returns:
+        (files written, files skipped as unchanged).
+    """
+    output_dir.mkdir(parents=True, exist_ok=True)
+    hashes = load_section_hashes()
+    mode = default_file_mode()
+    files = [(output_dir.resolve() / f"{date_str}.md", output) for date_str, output in outputs]
+
+    def sync(item: tuple[Path, str]) -> tuple[bool, Optional[dict]]:
+        output_file, output = item
+        return sync_daily_file(output_file, output, section_title, hashes.get(str(output_file)), mode)
+
+    if workers <= 1 or len(files) <= 1:
+        results = list(map(sync, files))
+    else:
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(sync, files))
+
+    written = 0
+    for (output_file, _), (was_written, record) in zip(files, results):
+        written += was_written
+        hashes[str(output_file)] = record
+    save_section_hashes(hashes)
+    return written, len(files) - written
+
+
+def backfill_start_date(value: str, today: datetime) -> Optional[str]:
+    """Resolve --backfill as YYYY-MM-DD or a relative period like 180d, 26w or 6m.
+
+    Args:
+        value: The --backfill argument.
+        today: Current date.
+
+    Returns:
+        First date of the backfill in YYYY-MM-DD format, or None if the value is not recognized.
+    """
+    match = re.match(r"^(\d+)([dwm])$", value)
+    if not match:
+        try:
+            return datetime.strptime(value, "%Y-%m-%d").strftime("%Y-%m-%d")
+        except ValueError:
+            return None
+    amount, unit = int(match.group(1)), match.group(2)
+    if unit == "m":
+        month_index = today.year * 12 + today.month - 1 - amount
+        year, month = divmod(month_index, 12)
+        day = min(today.day, calendar.monthrange(year, month + 1)[1])
+        return today.replace(year=year, month=month + 1, day=day).strftime("%Y-%m-%d")
+    days = amount * (7 if unit == "w" else 1)
+    return (today - timedelta(days=days)).strftime("%Y-%m-%d")
+
+
+def date_range(from_date: str, to_date: str) -> list[str]:
+    """List the dates from from_date to to_date inclusive.
+
+    Args:
+        from_date: First date in YYYY-MM-DD format.
+        to_date: Last date in YYYY-MM-DD format.
+
+    Returns:
+        Dates in YYYY-MM-DD format; empty if to_date is before from_date.
+
+    Raises:
+        ValueError: If a date is not in YYYY-MM-DD format.
+    """
+    first = datetime.strptime(from_date, "%Y-%m-%d")
+    last = datetime.strptime(to_date, "%Y-%m-%d")
+    return [(first + timedelta(days=i)).strftime("%Y-%m-%d") for i in range((last - first).days + 1)]
+
+
+def bucket_entries_by_day(entries: Iterable[dict], day_starts: list[int]) -> list[list[dict]]:
+    """Split entries into per-day buckets in one pass.
+
+    Args:
+        entries: History entries within [day_starts[0], day_starts[-1]).
+        day_starts: Ascending epoch ms day boundaries; the last one ends the last day.
+
+    Returns:
+        One list of entries per day (len(day_starts) - 1 lists).
+    """
+    buckets = [[] for _ in day_starts[:-1]]
+    for entry in entries:
+        day = bisect_right(day_starts, entry["timestamp"]) - 1
+        if 0 <= day < len(buckets):
+            buckets[day].append(entry)
+    return buckets
+
+
+def report_range(
+    history_file: Path,
+    dates: list[str],
+    ticket_patterns: list[str],
+    tz_name: Optional[str] = None
+) -> list[tuple[str, list[dict], dict[str, dict]]]:
+    """Build the reports of several days from a single pass over history.jsonl.
+
+    Days are bucketed while the range is read once, and session lookups are
+    shared across days (see SessionFinder).
+
+    Args:
+        history_file: Path to history.jsonl file.
+        dates: Consecutive dates in YYYY-MM-DD format.
+        ticket_patterns: List of regex patterns for ticket matching.
+        tz_name: Timezone name for day boundaries. Defaults to system timezone.
+
+    Returns:
+        (date, entries, groups) for each day that has entries.
+    """
+    next_day = (datetime.strptime(dates[-1], "%Y-%m-%d") + timedelta(days=1)).strftime("%Y-%m-%d")
+    day_starts = [get_start_of_day_epoch_ms(d, tz_name) for d in dates + [next_day]]
+    entries = read_history_range(history_file, day_starts[0], day_starts[-1])
+
+    reports = []
+    finder = SessionFinder(day_starts)
+    try:
+        for i, day_entries in enumerate(bucket_entries_by_day(entries, day_starts)):
+            if day_entries:
+                groups = group_by_ticket_and_project(day_entries, ticket_patterns, day_starts[i],
+                                                     day_starts[i + 1], finder=finder)
+                reports.append((dates[i], day_entries, groups))
+    finally:
+        finder.close()
+    return reports
+
+
 def load_config(config_path: Optional[Path]) -> dict:
     """Load configuration from JSON file.
 
@@ -371,6 +1190,31 @@ def main():
         type=str,
         help="Target date in YYYY-MM-DD format (default: today)"
     )
+    parser.add_argument(
+        "--from",
+        type=str,
+        dest="from_date",
+        help="First date of a multi-day report in YYYY-MM-DD format (use with --to)"
+    )
+    parser.add_argument(
+        "--to",
+        type=str,
+        dest="to_date",
+        help="Last date of a multi-day report in YYYY-MM-DD format (default: today)"
+    )
+    parser.add_argument(
+        "--backfill",
+        type=str,
+        metavar="PERIOD",
+        help="With --output-dir: regenerate every daily file from a date (YYYY-MM-DD) "
+             "or period (e.g. 180d, 26w, 6m) until today"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Parallel file writers for --from/--to and --backfill (default: CPU count)"
+    )
     parser.add_argument(
         "--timezone",
         type=str,
@@ -395,6 +1239,21 @@ def main():
 
     args = parser.parse_args()
 
+    if args.backfill:
+        if args.date or args.from_date or args.to_date or args.json:
+            parser.error("--backfill cannot be combined with --date, --from, --to or --json")
+        if not args.output_dir:
+            parser.error("--backfill requires --output-dir")
+        args.from_date = backfill_start_date(args.backfill, datetime.now())
+        if not args.from_date:
+            parser.error("--backfill must be a date (YYYY-MM-DD) or a period like 180d, 26w or 6m")
+    if args.to_date and not args.from_date:
+        parser.error("--to requires --from")
+    if args.from_date and args.date:
+        parser.error("--date cannot be combined with --from/--to")
+    if args.from_date and args.json and args.output_dir:
+        parser.error("--json with --from prints one combined document; omit --output-dir")
+
     # Load config and merge with CLI args
     config = load_config(args.config)
 
@@ -408,6 +1267,18 @@ def main():
     if "section_title" in config:
         section_title = config["section_title"]
 
+    if args.from_date:
+        to_date = args.to_date or datetime.now().strftime("%Y-%m-%d")
+        try:
+            dates = date_range(args.from_date, to_date)
+        except ValueError:
+            parser.error("--from and --to must be dates in YYYY-MM-DD format")
+        if not dates:
+            parser.error("--to is before --from")
+        write_range_reports(report_range(history_file, dates, ticket_patterns, timezone),
+                            dates, args, section_title)
+        return
+
     # Get start of day epoch
     target_date = args.date
     start_epoch_ms = get_start_of_day_epoch_ms(target_date, timezone)
@@ -415,8 +1286,8 @@ def main():
     end_epoch_ms = start_epoch_ms + (24 * 60 * 60 * 1000)
 
     # Load and filter history
-    entries = load_history(history_file)
-    filtered = filter_entries_by_date(entries, start_epoch_ms)
+    entries = load_history(history_file, start_epoch_ms, end_epoch_ms)
+    filtered = filter_entries_by_date(entries, start_epoch_ms, end_epoch_ms)
 
     if not filtered:
         print("No entries found for the specified date.", file=sys.stderr)
@@ -426,18 +1297,8 @@ def main():
     groups = group_by_ticket_and_project(filtered, ticket_patterns, start_epoch_ms, end_epoch_ms)
 
     if args.json:
-        output = json.dumps({
-            "date": target_date or datetime.now().strftime("%Y-%m-%d"),
-            "entries_count": len(filtered),
-            "groups": {
-                k: {
-                    "directory": v["directory"],
-                    "session_ids": v["session_ids"],
-                    "activities": [e.get("display", "") for e in v["entries"]]
-                }
-                for k, v in groups.items()
-            }
-        }, indent=2, ensure_ascii=False)
+        date_str = target_date or datetime.now().strftime("%Y-%m-%d")
+        output = json.dumps(build_json_report(date_str, filtered, groups), indent=2, ensure_ascii=False)
     else:
         output = generate_markdown(groups, section_title)
 
@@ -445,34 +1306,47 @@ def main():
     if args.output_dir:
         date_str = target_date or datetime.now().strftime("%Y-%m-%d")
         output_file = args.output_dir / f"{date_str}.md"
+        if update_daily_file(output_file, output, section_title):
+            print(f"Updated: {output_file}", file=sys.stderr)
+        else:
+            print(f"Unchanged: {output_file}", file=sys.stderr)
+    else:
+        print(output)
 
-        # If file exists, update only the section
-        if output_file.exists():
-            with open(output_file, "r", encoding="utf-8") as f:
-                content = f.read()
 
-            # Find and replace section
-            section_pattern = rf"({re.escape(section_title)})\n[\s\S]*?(?=\n## |\Z)"
-            if re.search(section_pattern, content):
-                content = re.sub(section_pattern, output.rstrip(), content)
-            else:
-                # Append section after first heading
-                first_heading = re.search(r"^# .+$", content, re.MULTILINE)
-                if first_heading:
-                    pos = first_heading.end()
-                    content = content[:pos] + "\n\n" + output + content[pos:]
-                else:
-                    content = content + "\n\n" + output
-
-            with open(output_file, "w", encoding="utf-8") as f:
-                f.write(content)
-        else:
-            with open(output_file, "w", encoding="utf-8") as f:
-                f.write(output)
+def write_range_reports(
+    reports: list[tuple[str, list[dict], dict[str, dict]]],
+    dates: list[str],
+    args: argparse.Namespace,
+    section_title: str
+) -> None:
+    """Output the reports of a --from/--to range.
 
-        print(f"Updated: {output_file}", file=sys.stderr)
+    Args:
+        reports: (date, entries, groups) per day with entries, from report_range().
+        dates: All dates of the range in YYYY-MM-DD format.
+        args: Parsed command-line arguments.
+        section_title: Title for each day's section.
+    """
+    if not reports:
+        print("No entries found for the specified date range.", file=sys.stderr)
+        sys.exit(0)
+
+    if args.json:
+        print(json.dumps({
+            "from": dates[0],
+            "to": dates[-1],
+            "entries_count": sum(len(entries) for _, entries, _ in reports),
+            "days": [build_json_report(date_str, entries, groups) for date_str, entries, groups in reports]
+        }, indent=2, ensure_ascii=False))
+        return
+
+    outputs = [(date_str, generate_markdown(groups, section_title)) for date_str, _, groups in reports]
+    if args.output_dir:
+        written, unchanged = write_daily_files(outputs, args.output_dir, section_title, args.workers)
+        print(f"Updated: {written} daily files in {args.output_dir} ({unchanged} unchanged)", file=sys.stderr)
     else:
-        print(output)
+        print("\n".join(f"# {date_str}\n\n{output}" for date_str, output in outputs))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,162 @@
+#!/bin/bash
+set -euo pipefail
+
+SCRIPT_DIR=$(cd "$(dirname "$0")" && pwd)
+SCRIPTS_DIR="$SCRIPT_DIR/../skills/worktrace/scripts"
+SMART_COMMIT_DIR="$SCRIPT_DIR/../../smart-commit-plugin"
+TMPDIR_BASE=$(mktemp -d)
+ERRORS=0
+
+cleanup() {
+  rm -rf "$TMPDIR_BASE"
+}
+trap cleanup EXIT
+
+assert_eq() {
+  local label="$1" expected="$2" actual="$3"
+  if [ "$expected" != "$actual" ]; then
+    echo "  FAIL: $label - expected '$expected', got '$actual'"
+    ERRORS=$((ERRORS + 1))
+  else
+    echo "  OK: $label"
+  fi
+}
+
+# Print "<tool calls> <edited files>" for a session file twice: from the
+# worktrace digest (edits inside the project only, as smart-commit filters
+# them) and from smart-commit's parser
+compare_counts() {
+  local session_file="$1" project="$2" session_id="$3"
+  HOME="$4" python3 "$SMART_COMMIT_DIR/skills/smart-commit/scripts/parse-session.py" \
+    --project "$project" --session "$session_id" > "$TMPDIR_BASE/parsed.json"
+  python3 - "$SCRIPTS_DIR" "$SMART_COMMIT_DIR/skills/smart-commit/scripts" \
+    "$session_file" "$project" "$TMPDIR_BASE/parsed.json" <<'PY'
+import json, sys
+from pathlib import Path
+sys.path.insert(0, sys.argv[1])
+import worktrace
+sys.path.insert(0, sys.argv[2])
+import session_parser
+from jsonl_reader import iter_jsonl
+
+session_file, project, parsed = Path(sys.argv[3]), sys.argv[4].rstrip("/") + "/", sys.argv[5]
+digest = worktrace.digest_session(session_file, [0, 2 ** 62])[0]
+files = [path for path in digest["files_edited"] if path.startswith(project)]
+print(digest["tool_calls"], len(files))
+
+tool_calls = sum(
+    len(session_parser.extract_tool_calls(entry))
+    for entry in iter_jsonl(session_file)
+    if isinstance(entry, dict) and (entry.get("type") == "assistant" or entry.get("role") == "assistant")
+)
+file_ops = json.load(open(parsed, encoding="utf-8"))["file_ops"]
+print(tool_calls, len({op["absolute_path"] for op in file_ops}))
+PY
+}
+
+# ── Test 1: smart-commit's fixture session ──
+echo "Test 1: Digest agrees with smart-commit's parser on the fixture session"
+PROJECT="/work/fixture"
+SESSION_ID="5f0c2a1e-7b3d-4c8e-9a21-0d6e4b7f3c90"
+FIXTURE_HOME="$TMPDIR_BASE/fixture"
+mkdir -p "$FIXTURE_HOME/.claude/projects/-work-fixture"
+SESSION_FILE="$FIXTURE_HOME/.claude/projects/-work-fixture/$SESSION_ID.jsonl"
+cp "$SMART_COMMIT_DIR/tests/fixtures/session.jsonl" "$SESSION_FILE"
+COUNTS=$(compare_counts "$SESSION_FILE" "$PROJECT" "$SESSION_ID" "$FIXTURE_HOME")
+assert_eq "digest matches parser" "$(echo "$COUNTS" | sed -n 2p)" "$(echo "$COUNTS" | sed -n 1p)"
+assert_eq "tool calls, edited files" "9 4" "$(echo "$COUNTS" | sed -n 1p)"
+
+# ── Test 2: Generated corpora in every entry shape ──
+echo "Test 2: Nested, flat and combined entry shapes give the same digest"
+for shape in nested flat both; do
+  python3 "$SMART_COMMIT_DIR/benchmarks/generate-corpus.py" --output "$TMPDIR_BASE/$shape" \
+    --turns 30 --seed 7 --entry-shape "$shape" > /dev/null
+done
+DIGESTS=$(python3 - "$SCRIPTS_DIR" "$TMPDIR_BASE" <<'PY'
+import json, sys
+from pathlib import Path
+sys.path.insert(0, sys.argv[1])
+import worktrace
+
+for shape in ("nested", "flat", "both"):
+    session = json.load(open(Path(sys.argv[2]) / shape / "corpus.json"))["sessions"][0]
+    digest = worktrace.digest_session(Path(session["path"]), [0, 2 ** 62])[0]
+    print(json.dumps(digest, sort_keys=True))
+PY
+)
+assert_eq "shapes agree" "1" "$(echo "$DIGESTS" | sort -u | wc -l | tr -d ' ')"
+ACTIVE=$(echo "$DIGESTS" | head -1 | python3 -c '
+import json, sys
+d = json.load(sys.stdin)
+print(d["prompts"] > 0, d["tool_calls"] > 0, len(d["files_edited"]) > 0)')
+assert_eq "non-zero activity" "True True True" "$ACTIVE"
+
+for shape in flat both; do
+  SESSION_FILE=$(python3 -c 'import json, sys; print(json.load(open(sys.argv[1]))["sessions"][0]["path"])' \
+    "$TMPDIR_BASE/$shape/corpus.json")
+  COUNTS=$(compare_counts "$SESSION_FILE" /bench/project "$(basename "$SESSION_FILE" .jsonl)" "$TMPDIR_BASE/$shape")
+  assert_eq "$shape: digest matches parser" "$(echo "$COUNTS" | sed -n 2p)" "$(echo "$COUNTS" | sed -n 1p)"
+done
+
+# ── Test 3: A session across midnight ──
+echo "Test 3: Each day counts only its own entries"
+export HOME="$TMPDIR_BASE/home"
+SESSION_ID="0b6c1d2e-3f40-4a5b-8c6d-7e8f90a1b2c3"
+mkdir -p "$HOME/.claude/projects/-work-app"
+cat > "$HOME/.claude/projects/-work-app/$SESSION_ID.jsonl" <<'JSONL'
+{"type":"user","timestamp":"2026-01-05T23:50:00.000Z","message":{"role":"user","content":"Add the export button"}}
+{"type":"assistant","timestamp":"2026-01-05T23:55:00.000Z","message":{"role":"assistant","content":[{"type":"tool_use","id":"t1","name":"Edit","input":{"file_path":"/work/app/a.py"}}]}}
+{"type":"user","timestamp":"2026-01-06T00:05:00.000Z","message":{"role":"user","content":[{"type":"text","text":"Now wire it up"}]}}
+{"type":"assistant","timestamp":"2026-01-06T00:10:00.000Z","message":{"role":"assistant","content":[{"type":"tool_use","id":"t2","name":"Write","input":{"file_path":"/work/app/b.py"}},{"type":"tool_use","id":"t3","name":"Edit","input":{"file_path":"/work/app/a.py"}}]}}
+JSONL
+cat > "$HOME/.claude/history.jsonl" <<JSONL
+{"display":"Add the export button","timestamp":1767657000000,"project":"/work/app","sessionId":"$SESSION_ID"}
+{"display":"Now wire it up","timestamp":1767657900000,"project":"/work/app","sessionId":"$SESSION_ID"}
+JSONL
+
+activity() {
+  python3 -c '
+import json, sys
+for day in json.load(sys.stdin)["days"] if len(sys.argv) < 2 else [json.load(sys.stdin)]:
+    for group in day["groups"].values():
+        s = group["sessions"][0]
+        print(day["date"], s["active_ms"] // 60000, s["prompts"], s["tool_calls"], s["files_edited"])
+' "$@"
+}
+
+RANGE=$(python3 "$SCRIPTS_DIR/worktrace.py" --from 2026-01-05 --to 2026-01-06 --timezone UTC --json | activity)
+assert_eq "range, first day" "2026-01-05 5 1 1 1" "$(echo "$RANGE" | sed -n 1p)"
+assert_eq "range, second day" "2026-01-06 5 1 2 2" "$(echo "$RANGE" | sed -n 2p)"
+SINGLE=$(for day in 2026-01-05 2026-01-06; do
+  python3 "$SCRIPTS_DIR/worktrace.py" --date "$day" --timezone UTC --json | activity single
+done)
+assert_eq "single days match range" "$RANGE" "$SINGLE"
+ROWS=$(python3 -c '
+import sqlite3, sys
+print(sqlite3.connect(sys.argv[1]).execute("SELECT COUNT(*) FROM digests").fetchone()[0])
+' "$HOME/.claude/cache/worktrace/session-digests.sqlite")
+assert_eq "one cached digest per day" "2" "$ROWS"
+
+# ── Test 4: Tool results are not decoded ──
+echo "Test 4: Tool-result lines only contribute their timestamp"
+DECODED=$(python3 - "$SCRIPTS_DIR" "$SMART_COMMIT_DIR/tests/fixtures/session.jsonl" <<'PY'
+import sys
+from pathlib import Path
+sys.path.insert(0, sys.argv[1])
+import worktrace
+
+decoded = []
+loads_line = worktrace.loads_line
+worktrace.loads_line = lambda line: decoded.append(line) or loads_line(line)
+worktrace.digest_session(Path(sys.argv[2]), [0, 2 ** 62])
+print(len(decoded), sum(worktrace.TOOL_RESULT_MARKER in line for line in decoded))
+PY
+)
+assert_eq "decoded lines, tool results among them" "13 0" "$DECODED"
+
+echo ""
+if [ "$ERRORS" -gt 0 ]; then
+  echo "test-activity-digest: $ERRORS failure(s)"
+  exit 1
+fi
+echo "test-activity-digest: all passed"
@@ -0,0 +1,69 @@
+#!/bin/bash
+set -euo pipefail
+
+SCRIPT_DIR=$(cd "$(dirname "$0")" && pwd)
+SCRIPTS_DIR="$SCRIPT_DIR/../skills/worktrace/scripts"
+TMPDIR_BASE=$(mktemp -d)
+ERRORS=0
+
+cleanup() {
+  rm -rf "$TMPDIR_BASE"
+}
+trap cleanup EXIT
+
+assert_eq() {
+  local label="$1" expected="$2" actual="$3"
+  if [ "$expected" != "$actual" ]; then
+    echo "  FAIL: $label - expected '$expected', got '$actual'"
+    ERRORS=$((ERRORS + 1))
+  else
+    echo "  OK: $label"
+  fi
+}
+
+export HOME="$TMPDIR_BASE/home"
+mkdir -p "$HOME/.claude"
+# One prompt at 10:00 UTC on 2026-01-05 and on 2026-01-06
+cat > "$HOME/.claude/history.jsonl" <<'JSONL'
+{"display":"Fix the login form","timestamp":1767607200000,"project":"/work/app","sessionId":"s"}
+{"display":"Add the export button","timestamp":1767693600000,"project":"/work/app","sessionId":"s"}
+JSONL
+
+OUT="$TMPDIR_BASE/daily"
+VAULT="$TMPDIR_BASE/vault"
+mkdir -p "$OUT" "$VAULT"
+printf '# Notes\n\nMorning standup.\n' > "$VAULT/2026-01-05.md"
+ln -s "$VAULT/2026-01-05.md" "$OUT/2026-01-05.md"
+# Dangling link: the note does not exist yet
+ln -s "$VAULT/2026-01-06.md" "$OUT/2026-01-06.md"
+
+worktrace() {
+  python3 "$SCRIPTS_DIR/worktrace.py" --timezone UTC --output-dir "$OUT" "$@" 2>/dev/null
+}
+
+is_link() {
+  if [ -L "$1" ]; then echo yes; else echo no; fi
+}
+
+# ── Test 1: Single day ──
+echo "Test 1: --date writes through a symlinked daily file"
+worktrace --date 2026-01-05
+assert_eq "still a symlink" "yes" "$(is_link "$OUT/2026-01-05.md")"
+assert_eq "existing notes kept" "1" "$(grep -c 'Morning standup' "$VAULT/2026-01-05.md")"
+assert_eq "section written to the target" "1" "$(grep -c 'Fix the login form' "$VAULT/2026-01-05.md")"
+assert_eq "no temporary files left" "" "$(ls -A "$OUT" "$VAULT" | grep '\.tmp$' || true)"
+
+# ── Test 2: Range ──
+echo "Test 2: --from/--to writes through symlinks, including a dangling one"
+worktrace --from 2026-01-05 --to 2026-01-06
+assert_eq "first day still a symlink" "yes" "$(is_link "$OUT/2026-01-05.md")"
+assert_eq "second day still a symlink" "yes" "$(is_link "$OUT/2026-01-06.md")"
+assert_eq "dangling target created" "1" "$(grep -c 'Add the export button' "$VAULT/2026-01-06.md")"
+assert_eq "first day section not duplicated" "1" "$(grep -c 'Fix the login form' "$VAULT/2026-01-05.md")"
+
+echo ""
+if [ "$ERRORS" -gt 0 ]; then
+  echo "test-output-files: $ERRORS failure(s)"
+  exit 1
+fi
+echo "test-output-files: all passed"
@@ -0,0 +1,92 @@
+#!/bin/bash
+set -euo pipefail
+
+SCRIPT_DIR=$(cd "$(dirname "$0")" && pwd)
+SCRIPTS_DIR="$SCRIPT_DIR/../skills/worktrace/scripts"
+TMPDIR_BASE=$(mktemp -d)
+ERRORS=0
+
+cleanup() {
+  rm -rf "$TMPDIR_BASE"
+}
+trap cleanup EXIT
+
+assert_eq() {
+  local label="$1" expected="$2" actual="$3"
+  if [ "$expected" != "$actual" ]; then
+    echo "  FAIL: $label - expected '$expected', got '$actual'"
+    ERRORS=$((ERRORS + 1))
+  else
+    echo "  OK: $label"
+  fi
+}
+
+export HOME="$TMPDIR_BASE/home"
+mkdir -p "$HOME/.claude"
+HISTORY="$TMPDIR_BASE/history.jsonl"
+# 2026-01-05 09:00 UTC onwards, one prompt per hour, with one entry out of order
+python3 - "$HISTORY" <<'PY'
+import json, sys
+base = 1767603600000
+with open(sys.argv[1], "w", encoding="utf-8") as f:
+    for i, hour in enumerate([0, 1, 2, 4, 3, 5, 30, 31]):
+        f.write(json.dumps({"display": f"prompt {i}", "timestamp": base + hour * 3600000,
+                            "project": "/work/app", "sessionId": "s"}) + "\n")
+PY
+
+worktrace() {
+  python3 "$SCRIPTS_DIR/worktrace.py" --timezone UTC --json "$@"
+}
+
+# ── Test 1: Process substitution ──
+echo "Test 1: History read from a pipe matches the regular file"
+for range in "--date 2026-01-05" "--from 2026-01-05 --to 2026-01-06"; do
+  # shellcheck disable=SC2086
+  EXPECTED=$(worktrace $range --history-file "$HISTORY")
+  # shellcheck disable=SC2086
+  ACTUAL=$(worktrace $range --history-file <(cat "$HISTORY"))
+  assert_eq "$range" "$EXPECTED" "$ACTUAL"
+done
+
+# ── Test 2: Named FIFO ──
+echo "Test 2: History read from a FIFO"
+mkfifo "$TMPDIR_BASE/fifo"
+cat "$HISTORY" > "$TMPDIR_BASE/fifo" &
+COUNT=$(worktrace --date 2026-01-05 --history-file "$TMPDIR_BASE/fifo" | python3 -c '
+import json, sys
+print(json.load(sys.stdin)["entries_count"])')
+wait
+assert_eq "entries on 2026-01-05" "6" "$COUNT"
+
+# ── Test 3: /dev/null ──
+echo "Test 3: Empty history from /dev/null"
+OUTPUT=$(python3 "$SCRIPTS_DIR/worktrace.py" --timezone UTC --date 2026-01-05 --history-file /dev/null 2>&1)
+assert_eq "no traceback" "No entries found for the specified date." "$OUTPUT"
+
+# ── Test 4: Reader functions ──
+echo "Test 4: jsonl_reader falls back to sequential reads"
+READS=$(python3 - "$SCRIPTS_DIR" "$HISTORY" <(cat "$HISTORY") <(cat "$HISTORY") <<'PY'
+import sys
+from pathlib import Path
+sys.path.insert(0, sys.argv[1])
+from jsonl_reader import bisect_lines, iter_jsonl, iter_lines, iter_lines_reversed
+
+history, pipe, reversed_pipe = (Path(arg) for arg in sys.argv[2:5])
+devnull = Path("/dev/null")
+offset = sum(len(line) for line in history.read_bytes().splitlines(keepends=True)[:2])
+print(bisect_lines(devnull, lambda line: 0, 1),
+      list(iter_lines(devnull)) == [] and list(iter_lines_reversed(devnull)) == []
+      and list(iter_jsonl(devnull)) == [],
+      bisect_lines(pipe, lambda line: 0, 1),
+      list(iter_lines(pipe, offset)) == list(iter_lines(history, offset)),
+      list(iter_lines_reversed(reversed_pipe)) == list(iter_lines_reversed(history)))
+PY
+)
+assert_eq "bisect, reads on /dev/null and pipes" "0 True 0 True True" "$READS"
+
+echo ""
+if [ "$ERRORS" -gt 0 ]; then
+  echo "test-pipe-input: $ERRORS failure(s)"
+  exit 1
+fi
+echo "test-pipe-input: all passed"